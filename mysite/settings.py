@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 from decouple import config, Csv
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "polls.middleware.RequestMetricsMiddleware",
+    "polls.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,17 +58,17 @@ LOGIN_REDIRECT_URL = 'polls:index'    # after login, show list of polls
 LOGOUT_REDIRECT_URL = 'login'
 
 AUTHENTICATION_BACKENDS = [
-    # username & password authentication
-    'django.contrib.auth.backends.ModelBackend',
+    # username & password authentication, users cached for USER_CACHE_TTL
+    'polls.backends.CachedModelBackend',
 ]
 
 ROOT_URLCONF = "mysite.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "polls.instrumentation.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
+        "APP_DIRS": False,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -73,6 +76,13 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # compiled templates are kept in memory between requests
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
         },
     },
 ]
@@ -86,7 +96,145 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # seconds a connection waits for a lock before giving up
+            "timeout": config("SQLITE_BUSY_TIMEOUT", cast=int,
+                              default=5000) / 1000,
+        },
+    }
+}
+
+# Optional read-only copy of the database that the index and results
+# pages read from (polls.routers), kept in sync by "manage.py sync_replica"
+REPLICA_DATABASE_NAME = config("REPLICA_DATABASE_NAME", default="")
+POLLS_READ_REPLICA = "replica" if REPLICA_DATABASE_NAME else ""
+if POLLS_READ_REPLICA:
+    DATABASES[POLLS_READ_REPLICA] = {
+        **DATABASES["default"],
+        "NAME": REPLICA_DATABASE_NAME,
+        "TEST": {"MIRROR": "default"},
     }
+
+DATABASE_ROUTERS = ["polls.routers.ReplicaRouter"]
+
+# Seconds after a vote during which its voter reads from the primary
+REPLICA_READ_YOUR_WRITES = config("REPLICA_READ_YOUR_WRITES", cast=int,
+                                  default=10)
+
+# PRAGMAs applied to every new SQLite connection (polls.sqlite)
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "mmap_size": config("SQLITE_MMAP_SIZE", cast=int, default=134217728),
+    "cache_size": config("SQLITE_CACHE_SIZE", cast=int, default=-20000),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT", cast=int, default=5000),
+    "temp_store": config("SQLITE_TEMP_STORE", default="MEMORY"),
+}
+
+# How often and after how long (doubling each time) a vote is written
+# again when SQLite reports "database is locked"
+SQLITE_LOCK_RETRIES = config("SQLITE_LOCK_RETRIES", cast=int, default=3)
+SQLITE_LOCK_RETRY_DELAY = config("SQLITE_LOCK_RETRY_DELAY", cast=float,
+                                 default=0.05)
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="ku-polls"),
+    }
+}
+
+# Where sessions are kept: "cached_db" (the cache, backed by the
+# database), "cache" (the cache only) or "signed_cookies"
+SESSION_STORE = config("SESSION_STORE", default="cached_db")
+if SESSION_STORE not in ("db", "cached_db", "cache", "signed_cookies"):
+    raise ImproperlyConfigured(f"Unknown SESSION_STORE {SESSION_STORE!r}.")
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_STORE}"
+
+# Seconds a logged-in user stays in the cache between two requests
+USER_CACHE_TTL = config("USER_CACHE_TTL", cast=int, default=60)
+
+# Seconds the results of a question stay in the cache
+RESULTS_CACHE_TTL = config("RESULTS_CACHE_TTL", cast=int, default=300)
+
+# Seconds a question and its choices stay in the cache for its detail page
+QUESTION_CACHE_TTL = config("QUESTION_CACHE_TTL", cast=int, default=300)
+
+# Serve the detail, results and vote pages with the async views in
+# polls.async_views (for deployments on the ASGI entry point)
+POLLS_ASYNC_VIEWS = config("POLLS_ASYNC_VIEWS", cast=bool, default=False)
+
+# Token-bucket limits on the vote, signup and ballots views, per client IP
+# and per user session, as "<burst>/<s|m|h|d>"; the buckets are kept in
+# this process ("local") or in the shared cache ("cache")
+RATE_LIMIT_BACKEND = config("RATE_LIMIT_BACKEND", default="local")
+RATE_LIMITS = {
+    "vote": {
+        "ip": config("VOTE_RATE_LIMIT_IP", default="600/m"),
+        "user": config("VOTE_RATE_LIMIT_USER", default="60/m"),
+    },
+    "signup": {
+        "ip": config("SIGNUP_RATE_LIMIT_IP", default="30/m"),
+    },
+    "ballots": {
+        "ip": config("BALLOTS_RATE_LIMIT_IP", default="30/m"),
+    },
+}
+
+# Seconds the rendered block of each question on the index stays in the
+# cache (it is rendered again as soon as the question changes)
+INDEX_FRAGMENT_TTL = config("INDEX_FRAGMENT_TTL", cast=int, default=3600)
+
+# Number of questions on each page of the poll index
+POLLS_PAGE_SIZE = config("POLLS_PAGE_SIZE", cast=int, default=20)
+
+# Seconds between two updates of the live results stream of a question
+LIVE_RESULTS_INTERVAL = config("LIVE_RESULTS_INTERVAL", cast=float,
+                               default=2.0)
+
+# How the vote view records votes: "sync" writes each vote before
+# responding, "buffered" queues it for a background flusher that writes
+# VOTE_BATCH_SIZE votes at a time, at least every VOTE_FLUSH_INTERVAL
+# seconds. When VOTE_BUFFER_LIMIT votes are waiting, votes are written
+# synchronously again.
+VOTE_INGEST_MODE = config("VOTE_INGEST_MODE", default="sync")
+VOTE_BATCH_SIZE = config("VOTE_BATCH_SIZE", cast=int, default=500)
+VOTE_FLUSH_INTERVAL = config("VOTE_FLUSH_INTERVAL", cast=float, default=0.5)
+VOTE_BUFFER_LIMIT = config("VOTE_BUFFER_LIMIT", cast=int, default=10000)
+
+# Most SQL queries each polls view may run in one request, counting the
+# session and user lookups; RequestMetricsMiddleware warns when a request
+# goes over and the tests in polls/tests/test_budgets.py enforce them.
+POLLS_QUERY_BUDGETS = {
+    "polls:index": 3,
+    "polls:detail": 4,
+    "polls:results": 3,
+    "polls:vote": 11,
+    "polls:search": 4,
+}
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # one JSON line per request to a polls view with what it cost
+        "polls.metrics": {
+            "handlers": ["console"],
+            "level": config("METRICS_LOG_LEVEL", default="WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
 # Password validation
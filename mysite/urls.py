@@ -14,6 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
@@ -22,7 +23,8 @@ from polls import views
 urlpatterns = [
     path("", RedirectView.as_view(url="polls/")),
     path("admin/", admin.site.urls),
-    path("polls/", include("polls.urls")),
+    path("polls/", include(
+        "polls.urls_async" if settings.POLLS_ASYNC_VIEWS else "polls.urls")),
     path('accounts/', include('django.contrib.auth.urls')),
     path('signup/', views.signup, name='signup'),
 ]
@@ -1,8 +1,72 @@
 from django.contrib import admin
 from polls.models import *
+from polls.results import invalidate_results
+from polls.voting import rebuild_tallies
 
-# Register your models here.
 
-admin.site.register(Question)
-admin.site.register(Choice)
-admin.site.register(Vote)
+class ChoiceInline(admin.TabularInline):
+    """ The choices of a question with their vote tallies. """
+    model = Choice
+    fields = ['choice_text', 'vote_count']
+    readonly_fields = ['vote_count']
+    extra = 1
+
+
+@admin.register(Question)
+class QuestionAdmin(admin.ModelAdmin):
+    fields = ['question_text', 'pub_date', 'end_date', 'total_votes']
+    readonly_fields = ['total_votes']
+    list_display = ['question_text', 'pub_date', 'end_date', 'total_votes']
+    search_fields = ['question_text']
+    date_hierarchy = 'pub_date'
+    inlines = [ChoiceInline]
+    show_full_result_count = False
+
+    def get_readonly_fields(self, request, obj=None):
+        # a finalized poll cannot be reopened, its snapshot is final
+        if obj is not None and obj.finalized_at is not None:
+            return ['pub_date', 'end_date', 'total_votes']
+        return self.readonly_fields
+
+
+@admin.register(Choice)
+class ChoiceAdmin(admin.ModelAdmin):
+    fields = ['question', 'choice_text', 'vote_count']
+    readonly_fields = ['vote_count']
+    list_display = ['choice_text', 'question', 'vote_count']
+    list_select_related = ['question']
+    autocomplete_fields = ['question']
+    search_fields = ['choice_text', 'question__question_text']
+    show_full_result_count = False
+
+
+@admin.register(Vote)
+class VoteAdmin(admin.ModelAdmin):
+    """ Votes, with the tallies of their questions recounted whenever
+    staff add, change or delete one.
+    """
+    list_display = ['id', 'user', 'question', 'choice']
+    list_select_related = ['user', 'question', 'choice']
+    raw_id_fields = ['user', 'question', 'choice']
+    search_fields = ['user__username']
+    show_full_result_count = False
+
+    @staticmethod
+    def _recount(question_ids) -> None:
+        question_ids = set(question_ids)
+        rebuild_tallies(question_ids)
+        invalidate_results(question_ids)
+
+    def save_model(self, request, obj, form, change):
+        old_question_id = form.initial.get('question') if change else None
+        super().save_model(request, obj, form, change)
+        self._recount({obj.question_id, old_question_id} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._recount([obj.question_id])
+
+    def delete_queryset(self, request, queryset):
+        question_ids = set(queryset.values_list('question_id', flat=True))
+        super().delete_queryset(request, queryset)
+        self._recount(question_ids)
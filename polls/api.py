@@ -0,0 +1,212 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.http import HttpRequest, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from polls.ballots import submit_ballots
+from polls.models import Question, Choice, Vote, ArchivedVote
+from polls.pagination import decode_cursor, keyset_page
+from polls.ratelimit import rate_limit
+from polls.views import POLL_STATUSES, _questions_by_status
+
+# the fields each endpoint can return, by name in the API and in the model
+QUESTION_FIELDS = {
+    'id': 'id',
+    'question_text': 'question_text',
+    'pub_date': 'pub_date',
+    'end_date': 'end_date',
+    'is_open': 'is_open',
+    'total_votes': 'total_votes',
+}
+DETAIL_FIELDS = {**QUESTION_FIELDS, 'choices': None}
+CHOICE_FIELDS = {'id': 'id', 'choice_text': 'choice_text',
+                 'votes': 'vote_count'}
+VOTE_FIELDS = {'question': 'question_id', 'choice': 'choice_id',
+               'choice_text': 'choice__choice_text'}
+
+# the most ballots one request to the ballots endpoint may carry
+MAX_BALLOTS = 10000
+
+
+class FieldError(ValueError):
+    """ Raised when ``?fields=`` names a field the endpoint lacks. """
+
+
+def _fields(request: HttpRequest, allowed: dict) -> list:
+    """
+    Returns the fields asked for with ``?fields=a,b`` (all of them when
+    the parameter is missing), in the order of ``allowed``.
+
+    Raises:
+        FieldError: If a field is not in ``allowed``.
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return list(allowed)
+    wanted = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = wanted - set(allowed)
+    if unknown or not wanted:
+        raise FieldError(
+            f"Unknown fields: {', '.join(sorted(unknown)) or '(none)'}. "
+            f"Choose from: {', '.join(allowed)}.")
+    return [name for name in allowed if name in wanted]
+
+
+def _project(row: dict, fields: list, mapping: dict) -> dict:
+    return {name: row[mapping[name]] for name in fields}
+
+
+def _bad_request(exc: Exception) -> JsonResponse:
+    return JsonResponse({'error': str(exc)}, status=400)
+
+
+def question_list(request: HttpRequest) -> JsonResponse:
+    """ Published questions, newest first, POLLS_PAGE_SIZE at a time.
+
+    Query parameters:
+        status: ``open`` or ``closed`` to list only those polls.
+        cursor: The ``next_cursor`` of the previous page.
+        fields: Comma separated fields of each question to return.
+    """
+    try:
+        fields = _fields(request, QUESTION_FIELDS)
+    except FieldError as exc:
+        return _bad_request(exc)
+    status = request.GET.get('status')
+    if status is not None and status not in POLL_STATUSES:
+        return _bad_request(ValueError("status must be open or closed."))
+    cursor = request.GET.get('cursor')
+    if cursor and decode_cursor(cursor) is None:
+        return _bad_request(ValueError(
+            "cursor must be the next_cursor of a page."))
+
+    # the cursor is built from the pub_date and id of the last question
+    columns = {QUESTION_FIELDS[name] for name in fields} | {'id', 'pub_date'}
+    page, next_cursor = keyset_page(
+        _questions_by_status(status).values(*columns),
+        cursor, settings.POLLS_PAGE_SIZE)
+    return JsonResponse({
+        'results': [_project(row, fields, QUESTION_FIELDS) for row in page],
+        'next_cursor': next_cursor,
+    })
+
+
+def question_detail(request: HttpRequest, pk: int) -> JsonResponse:
+    """ A published question with its choices.
+
+    Query parameters:
+        fields: Comma separated fields of the question to return;
+            ``choices`` adds its choices.
+    """
+    try:
+        fields = _fields(request, DETAIL_FIELDS)
+    except FieldError as exc:
+        return _bad_request(exc)
+
+    now = timezone.now()
+    columns = {QUESTION_FIELDS[name] for name in fields if name != 'choices'}
+    question = Question.objects.with_status(now).published(now)\
+        .filter(pk=pk).values(*columns or ['id']).first()
+    if question is None:
+        return JsonResponse(
+            {'error': f"Question number {pk} does not exists."}, status=404)
+
+    result = _project(question, [name for name in fields
+                                 if name != 'choices'], QUESTION_FIELDS)
+    if 'choices' in fields:
+        result['choices'] = [
+            _project(choice, list(CHOICE_FIELDS), CHOICE_FIELDS)
+            for choice in Choice.objects.filter(question_id=pk)
+            .order_by('pk').values(*CHOICE_FIELDS.values())
+        ]
+    return JsonResponse(result)
+
+
+def my_vote(request: HttpRequest, pk: int) -> JsonResponse:
+    """ The requesting user's current vote on a question, or null.
+
+    Query parameters:
+        fields: Comma separated fields of the vote to return.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': "Log in to see your vote."},
+                            status=401)
+    try:
+        fields = _fields(request, VOTE_FIELDS)
+    except FieldError as exc:
+        return _bad_request(exc)
+
+    columns = [VOTE_FIELDS[name] for name in fields]
+    vote = Vote.objects.filter(user=request.user, question_id=pk)\
+        .values(*columns).first()
+    if vote is None:
+        vote = ArchivedVote.objects.filter(user=request.user, question_id=pk)\
+            .values(*columns).first()
+    return JsonResponse({
+        'vote': None if vote is None else _project(vote, fields, VOTE_FIELDS)
+    })
+
+
+def _basic_auth_user(request: HttpRequest):
+    """
+    Returns the user whose username and password the request carries in
+    an ``Authorization: Basic`` header, or None.
+    """
+    kind, _, credentials = \
+        request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if kind.lower() != 'basic':
+        return None
+    try:
+        username, _, password = base64.b64decode(credentials, validate=True)\
+            .decode().partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return authenticate(request, username=username, password=password)
+
+
+def _unauthorized() -> JsonResponse:
+    response = JsonResponse(
+        {'error': "Give the username and password of a staff member."},
+        status=401)
+    response['WWW-Authenticate'] = 'Basic realm="ku-polls ballots"'
+    return response
+
+
+# kiosks authenticate every request with a staff login instead of a
+# session, so there is no cookie to forge and no CSRF token to fetch
+@csrf_exempt
+@rate_limit('ballots')
+@require_POST
+def ballots(request: HttpRequest) -> JsonResponse:
+    """ Staff-only replay of ballots collected offline, e.g. by kiosks,
+    as a JSON body ``{"ballots": [{"user": 1, "question": 2, "choice": 3,
+    "timestamp": "2023-10-01T09:30:00+07:00"}, ...]}``, authenticated
+    with the HTTP Basic credentials of a staff member.
+
+    Answers with the status of each ballot, see
+    polls.ballots.submit_ballots().
+    """
+    user = _basic_auth_user(request)
+    if user is None:
+        return _unauthorized()
+    if not user.is_staff:
+        return JsonResponse({'error': "Only staff can submit ballots."},
+                            status=403)
+    if request.content_type != 'application/json':
+        return JsonResponse({'error': "Send the ballots as JSON."},
+                            status=415)
+    try:
+        batch = json.loads(request.body)['ballots']
+    except (ValueError, TypeError, KeyError):
+        return _bad_request(ValueError(
+            'The body must be a JSON object {"ballots": [...]}.'))
+    if not isinstance(batch, list) or len(batch) > MAX_BALLOTS:
+        return _bad_request(ValueError(
+            f"ballots must be a list of at most {MAX_BALLOTS} ballots."))
+    return JsonResponse(submit_ballots(batch))
@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class PollsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "polls"
+
+    def ready(self):
+        from polls.backends import forget_user
+        from polls.conditional import catalog_changed
+        from polls.search import search_changed
+        from polls.sqlite import configure_sqlite
+        connection_created.connect(configure_sqlite)
+        post_save.connect(forget_user, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(forget_user, sender=settings.AUTH_USER_MODEL)
+        user_logged_out.connect(forget_user)
+        for model in (self.get_model('Question'), self.get_model('Choice')):
+            post_save.connect(catalog_changed, sender=model)
+            post_delete.connect(catalog_changed, sender=model)
+            post_save.connect(search_changed, sender=model)
+            post_delete.connect(search_changed, sender=model)
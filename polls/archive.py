@@ -0,0 +1,98 @@
+import itertools
+
+from django.db import transaction
+from django.utils import timezone
+
+from polls.models import Question, Choice, Vote, ResultSnapshot, ArchivedVote
+from polls.questions import invalidate_questions
+from polls.results import invalidate_results
+from polls.voting import _results_changed, rebuild_tallies
+
+
+def finalize_question(question_id: int, now=None) -> bool:
+    """
+    Recounts the votes of a closed question and writes them to
+    ResultSnapshot, from which its results are served from then on.
+
+    Returns:
+        bool: True if the question was finalized, False if it was
+        already final or is not closed at ``now``.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        question = Question.objects.select_for_update().get(pk=question_id)
+        if question.finalized_at is not None or question.end_date is None \
+                or question.end_date >= now:
+            return False
+
+        rebuild_tallies([question_id])
+        ResultSnapshot.objects.bulk_create([
+            ResultSnapshot(question_id=question_id, choice_id=choice_id,
+                           choice_text=choice_text, votes=votes)
+            for choice_id, choice_text, votes
+            in Choice.objects.filter(question_id=question_id)
+            .values_list('pk', 'choice_text', 'vote_count')
+        ])
+        Question.objects.filter(pk=question_id).update(
+            finalized_at=now, **_results_changed())
+    invalidate_results([question_id])
+    invalidate_questions([question_id])
+    return True
+
+
+def archive_votes(question_id: int, chunk_size: int = 5000) -> int:
+    """
+    Moves the votes of a finalized question from the Vote table to
+    ArchivedVote, chunk_size at a time, in one transaction.
+
+    Returns:
+        int: The number of votes moved.
+
+    Raises:
+        ValueError: If the question is not finalized.
+    """
+    if not Question.objects.filter(pk=question_id,
+                                   finalized_at__isnull=False).exists():
+        raise ValueError(f"Question {question_id} is not finalized.")
+
+    votes = Vote.objects.filter(question_id=question_id)
+    rows = votes.order_by('pk').values_list('user_id', 'choice_id')\
+        .iterator(chunk_size=chunk_size)
+    moved = 0
+    with transaction.atomic():
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            ArchivedVote.objects.bulk_create(
+                [ArchivedVote(user_id=user_id, question_id=question_id,
+                              choice_id=choice_id)
+                 for user_id, choice_id in chunk],
+                ignore_conflicts=True)
+            moved += len(chunk)
+        votes.delete()
+    return moved
+
+
+def finalize_closed_polls(now=None, archive: bool = False) -> dict:
+    """
+    Finalizes every poll closed at ``now`` that is not final yet and,
+    with ``archive``, moves the votes of all finalized polls out of the
+    Vote table.
+
+    Returns:
+        dict: The ids of the questions finalized and the number of votes
+        archived.
+    """
+    now = now or timezone.now()
+    finalized = [
+        question_id for question_id
+        in Question.objects.closed(now).filter(finalized_at__isnull=True)
+        .values_list('pk', flat=True)
+        if finalize_question(question_id, now)
+    ]
+
+    archived = 0
+    if archive:
+        for question_id in Vote.objects.filter(
+                question__finalized_at__isnull=False)\
+                .values_list('question_id', flat=True).distinct():
+            archived += archive_votes(question_id)
+    return {'finalized': finalized, 'archived_votes': archived}
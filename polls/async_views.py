@@ -0,0 +1,160 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpRequest, HttpResponse
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.views import generic
+
+from polls.ingest import get_vote_buffer
+from polls.conditional import acatalog_version
+from polls.live import results_events
+from polls.models import Question, Choice
+from polls.questions import acached_question
+from polls.ratelimit import rate_limit
+from polls.results import acached_results, arefresh_results
+from polls.views import alatest_questions, find_choice, render_results
+from polls.views import voted_choice_ids
+from polls.voting import VotingClosed, cast_vote
+
+
+async def _auser(request: HttpRequest):
+    """
+    Returns the user of the request, loading it from the session in a
+    worker thread the first time, as the sync ORM must not run in the
+    event loop.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+class DetailView(generic.View):
+    """ Async detail view for the polls app, the same as
+    polls.views.DetailView.
+    """
+
+    async def get(self, request: HttpRequest, **kwargs) -> HttpResponse:
+        this_user = await _auser(request)
+        if not this_user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        entry = await acached_question(kwargs["pk"])
+        if entry is None:
+            messages.error(
+                request,
+                f"Question number {kwargs['pk']} does not exists.❗️")
+            return redirect("polls:index")
+        question, choices = entry
+
+        choice_ids = [choice_id async for choice_id
+                      in voted_choice_ids(this_user, question)[:1]]
+        selected_choice = find_choice(choices, choice_ids)
+        has_voted = selected_choice is not None
+
+        context = {
+            'question': question,
+            'choices': choices,
+            'has_voted': has_voted,
+            'choice_text': selected_choice,
+            'selected_choice': selected_choice,
+        }
+
+        if has_voted or question.can_vote():
+            return render(request, 'polls/detail.html', context)
+        else:
+            raise Http404
+
+
+class ResultsView(generic.View):
+    """ Async results view for the polls app, the same as
+    polls.views.ResultsView.
+    """
+
+    async def get(self, request: HttpRequest, **kwargs) -> HttpResponse:
+        results = (await acached_results([kwargs["pk"]])).get(kwargs["pk"])
+        if results is None:
+            messages.error(
+                request,
+                f"Result question number {kwargs['pk']} does not exists.❗️")
+            return redirect("polls:index")
+
+        return render_results(request, results, await acatalog_version())
+
+
+@rate_limit('vote')
+async def vote(request: HttpRequest, question_id: int) -> HttpResponse:
+    """ Async vote view for the polls app, the same as polls.views.vote.
+
+    The vote itself is written by polls.voting.cast_vote in a worker
+    thread, because transactions are not available to async code.
+    """
+    this_user = await _auser(request)
+    if not this_user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    try:
+        question = await Question.objects.aget(pk=question_id)
+    except Question.DoesNotExist:
+        raise Http404("No Question matches the given query.")
+    if question.finalized_at is not None or not question.can_vote():
+        raise Http404
+
+    try:
+        selected_choice = await question.choice_set.aget(
+            pk=request.POST['choice'])
+    except (KeyError, Choice.DoesNotExist):
+        question, choices = await acached_question(question_id)
+        return render(request, 'polls/detail.html', {
+            'question': question,
+            'choices': choices,
+            'error_message': "You didn't select a choice.❗",
+        })
+
+    vote_buffer = get_vote_buffer()
+    if vote_buffer is not None and vote_buffer.submit(
+            this_user.id, question.id, selected_choice.id):
+        return HttpResponseRedirect(
+            reverse('polls:results', args=(question.id,)))
+
+    try:
+        switched = await sync_to_async(cast_vote)(
+            this_user, question, selected_choice)
+    except VotingClosed:
+        raise Http404
+    await arefresh_results(question.id)
+
+    if switched:
+        question_objects, next_cursor = await alatest_questions()
+        return render(request, 'polls/index.html',
+                      {'message': '⭐️ Vote successfully updated ⭐️️',
+                       'latest_question_list': question_objects,
+                       'next_cursor': next_cursor,
+                       'is_first_page': True,
+                       'fragment_ttl': settings.INDEX_FRAGMENT_TTL,
+                       'choice_id': question_id})
+
+    return HttpResponseRedirect(reverse('polls:results', args=(question.id,)))
+
+
+async def results_stream(request: HttpRequest, pk: int) -> HttpResponse:
+    """ Streams the results of a question as Server-Sent Events.
+
+    Under WSGI a response cannot stay open without holding a thread, so
+    there the stream ends after one event and the client reconnects.
+    """
+    if not await Question.objects.filter(pk=pk).aexists():
+        raise Http404("No Question matches the given query.")
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(results_events(pk),
+                                         content_type='text/event-stream')
+    else:
+        events = [event async for event in results_events(pk, once=True)]
+        response = HttpResponse(''.join(events),
+                                content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
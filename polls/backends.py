@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id) -> str:
+    return f'polls:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ ModelBackend that keeps the users it loads for the session in the
+    cache for USER_CACHE_TTL seconds, so an authenticated request does not
+    read the auth_user table every time.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TTL)
+        return user if self.user_can_authenticate(user) else None
+
+
+def forget_user(sender, instance=None, user=None, **kwargs) -> None:
+    """
+    Drops a user from the cache when they are saved (a password change
+    included), deleted or log out. Receiver of post_save, post_delete and
+    user_logged_out.
+    """
+    user = instance or user
+    if user is not None and user.pk is not None:
+        cache.delete(user_cache_key(user.pk))
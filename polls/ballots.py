@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from polls.models import Question, Choice, Vote, MAX_ID
+from polls.results import refresh_results
+from polls.voting import apply_votes
+
+ACCEPTED = 'accepted'
+SUPERSEDED = 'superseded'
+REJECTED = 'rejected'
+
+
+def _ballot_id(value) -> int:
+    """
+    Returns the id given as a number or a string of digits.
+
+    Raises:
+        ValueError: If ``value`` is not an id the database can hold.
+    """
+    # int() would also take 1.5 and True
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError
+    value = int(value)
+    if not 1 <= value <= MAX_ID:
+        raise ValueError
+    return value
+
+
+def _parse_ballot(ballot, now):
+    """
+    Returns the (user id, question id, choice id, timestamp) of a ballot
+    such as ``{"user": 1, "question": 2, "choice": 3, "timestamp":
+    "2023-10-01T09:30:00+07:00"}``; a ballot without timestamp was cast
+    at ``now``.
+
+    Raises:
+        ValueError: If the ballot is not in that form.
+    """
+    if not isinstance(ballot, dict):
+        raise ValueError("A ballot must be an object.")
+    try:
+        user_id, question_id, choice_id = (
+            _ballot_id(ballot[name])
+            for name in ('user', 'question', 'choice'))
+    except KeyError as exc:
+        raise ValueError(f"The ballot has no {exc.args[0]}.")
+    except ValueError:
+        raise ValueError("user, question and choice must be ids.")
+
+    timestamp = ballot.get('timestamp')
+    if timestamp in (None, ''):
+        return user_id, question_id, choice_id, now
+    when = parse_datetime(str(timestamp))
+    if when is None:
+        raise ValueError(f"Invalid timestamp {timestamp!r}.")
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return user_id, question_id, choice_id, when
+
+
+def submit_ballots(ballots, now=None) -> dict:
+    """
+    Validates a batch of ballots collected offline and records the valid
+    ones with apply_votes(), in one transaction.
+
+    Each ballot is checked as of its own timestamp: the poll must have
+    accepted votes then (Question.can_vote()) and not be finalized since.
+    Of several valid ballots of a user on one question, the latest one is
+    recorded and the others are superseded, as is a ballot cast before
+    the vote the user already has on the question (e.g. on the web).
+
+    Returns:
+        dict: The status of each ballot (accepted, superseded or rejected,
+        with the error of a rejected one), in the order given, and the
+        number of ballots with each status.
+    """
+    now = now or timezone.now()
+    results = []
+    parsed = {}
+    for index, ballot in enumerate(ballots):
+        try:
+            parsed[index] = _parse_ballot(ballot, now)
+        except ValueError as exc:
+            results.append({'status': REJECTED, 'error': str(exc)})
+        else:
+            results.append({'status': ACCEPTED})
+
+    # one query per model for the whole batch
+    questions = Question.objects.only('pub_date', 'end_date', 'finalized_at')\
+        .in_bulk({question_id for _, question_id, _, _ in parsed.values()})
+    choices = dict(Choice.objects.filter(
+        pk__in={choice_id for _, _, choice_id, _ in parsed.values()})
+        .values_list('pk', 'question_id'))
+    users = set(get_user_model().objects.filter(
+        pk__in={user_id for user_id, _, _, _ in parsed.values()},
+        is_active=True).values_list('pk', flat=True))
+
+    latest = {}
+    for index, (user_id, question_id, choice_id, when) \
+            in parsed.items():
+        question = questions.get(question_id)
+        if user_id not in users:
+            error = f"User {user_id} does not exist or is inactive."
+        elif question is None:
+            error = f"Question {question_id} does not exist."
+        elif choices.get(choice_id) != question_id:
+            error = f"Choice {choice_id} is not a choice of question " \
+                    f"{question_id}."
+        elif when > now:
+            error = "The ballot is dated in the future."
+        elif question.finalized_at is not None:
+            error = "The poll is finalized."
+        elif not question.can_vote(when):
+            error = "The poll did not accept votes at the ballot's time."
+        else:
+            key = (user_id, question_id)
+            if key in latest:
+                kept = latest[key]
+                if parsed[kept][3] > when:
+                    results[index]['status'] = SUPERSEDED
+                    continue
+                results[kept]['status'] = SUPERSEDED
+            latest[key] = index
+            continue
+        results[index] = {'status': REJECTED, 'error': error}
+
+    # votes cast since, online or in an earlier batch, stay
+    for user_id, question_id, cast_at in Vote.objects.filter(
+            user_id__in={user_id for user_id, _ in latest},
+            question_id__in={question_id for _, question_id in latest},
+            cast_at__isnull=False)\
+            .values_list('user_id', 'question_id', 'cast_at'):
+        index = latest.get((user_id, question_id))
+        if index is not None and cast_at > parsed[index][3]:
+            results[index]['status'] = SUPERSEDED
+            del latest[(user_id, question_id)]
+
+    question_ids = apply_votes(parsed[index]
+                               for index in sorted(latest.values()))
+    for question_id in question_ids:
+        refresh_results(question_id)
+
+    counts = {ACCEPTED: 0, SUPERSEDED: 0, REJECTED: 0}
+    for result in results:
+        counts[result['status']] += 1
+    return {'results': results, **counts}
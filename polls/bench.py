@@ -0,0 +1,244 @@
+import datetime
+import itertools
+import math
+import platform
+import random
+import sqlite3
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Question, Choice, Vote
+from polls.search import rebuild_search_index, search_enabled
+from polls.voting import rebuild_tallies
+
+SCENARIOS = ('index', 'detail', 'results', 'vote', 'signup')
+
+# the most rows written by one bulk insert while building the dataset
+BULK_SIZE = 5000
+
+
+def build_dataset(questions: int, choices: int, votes: int,
+                  seed: int = 0) -> dict:
+    """
+    Fills the database with ``questions`` polls of ``choices`` choices
+    each and ``votes`` votes on every poll, one per voter. One poll in
+    ten is closed, the others are open.
+
+    Returns:
+        dict: The ids of the open questions and of their choices.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    Question.objects.bulk_create(
+        [Question(question_text=f"Benchmark question {number}",
+                  pub_date=now - datetime.timedelta(hours=number + 1),
+                  end_date=now + datetime.timedelta(
+                      days=-1 if number % 10 == 9 else 30))
+         for number in range(questions)],
+        batch_size=BULK_SIZE)
+    question_ids = list(Question.objects.order_by('pk')
+                        .values_list('pk', flat=True))
+    Choice.objects.bulk_create(
+        [Choice(question_id=question_id, choice_text=f"Choice {number}")
+         for question_id in question_ids for number in range(choices)],
+        batch_size=BULK_SIZE)
+    choices_of = {}
+    for choice_id, question_id in Choice.objects.order_by('pk')\
+            .values_list('pk', 'question_id'):
+        choices_of.setdefault(question_id, []).append(choice_id)
+
+    # voters cannot log in, creating them must not hash passwords
+    unusable = make_password(None)
+    get_user_model().objects.bulk_create(
+        [get_user_model()(username=f"bench-voter-{number}",
+                          password=unusable)
+         for number in range(votes)],
+        batch_size=BULK_SIZE)
+    voter_ids = list(get_user_model().objects
+                     .filter(username__startswith="bench-voter-")
+                     .values_list('pk', flat=True))
+    if choices:
+        rows = (Vote(user_id=user_id, question_id=question_id,
+                     choice_id=rng.choice(choices_of[question_id]))
+                for question_id in question_ids for user_id in voter_ids)
+        while batch := list(itertools.islice(rows, BULK_SIZE)):
+            Vote.objects.bulk_create(batch)
+    rebuild_tallies()
+    if search_enabled():
+        rebuild_search_index()
+
+    open_ids = list(Question.objects.open(now).filter(choice__isnull=False)
+                    .distinct().values_list('pk', flat=True))
+    return {'open_questions': open_ids,
+            'choices': {question_id: choices_of[question_id]
+                        for question_id in open_ids}}
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns the value below which ``fraction`` of the sorted ``values``
+    fall (nearest rank).
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies: list, queries: list, elapsed: float,
+              statuses: list) -> dict:
+    """
+    Returns the throughput, latency percentiles (ms) and query counts of
+    one scenario.
+    """
+    latencies = sorted(latencies)
+    queries = sorted(queries)
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            name: round(percentile(latencies, fraction) * 1000, 3)
+            for name, fraction in (('p50', 0.5), ('p90', 0.9),
+                                   ('p99', 0.99), ('max', 1.0))
+        },
+        'queries': {'p50': percentile(queries, 0.5),
+                    'max': percentile(queries, 1.0)},
+        'errors': sum(1 for status in statuses if status >= 400),
+    }
+
+
+class _Requests:
+    """ The request each scenario sends, from a logged in client but for
+    signup, sent by a new anonymous client each time.
+    """
+
+    def __init__(self, dataset: dict, seed: int):
+        self.rng = random.Random(seed)
+        self.open_questions = dataset['open_questions']
+        self.choices = dataset['choices']
+        self.signups = itertools.count()
+        user = get_user_model().objects.create_user("bench-user")
+        self.client = Client()
+        self.client.force_login(user)
+
+    def index(self):
+        return self.client.get(reverse('polls:index'))
+
+    def detail(self):
+        question_id = self.rng.choice(self.open_questions)
+        return self.client.get(reverse('polls:detail', args=(question_id,)))
+
+    def results(self):
+        question_id = self.rng.choice(self.open_questions)
+        return self.client.get(reverse('polls:results', args=(question_id,)))
+
+    def vote(self):
+        question_id = self.rng.choice(self.open_questions)
+        return self.client.post(
+            reverse('polls:vote', args=(question_id,)),
+            {'choice': self.rng.choice(self.choices[question_id])})
+
+    def signup(self):
+        password = "Bench-pass-2023"
+        return Client().post(reverse('signup'), {
+            'username': f"bench-signup-{next(self.signups)}",
+            'password1': password, 'password2': password})
+
+
+def run_scenario(send, requests: int, warmup: int) -> dict:
+    """
+    Sends ``warmup`` requests, then times ``requests`` more one by one.
+    """
+    for _ in range(warmup):
+        send()
+    latencies, queries, statuses = [], [], []
+    start = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            began = time.perf_counter()
+            response = send()
+            latencies.append(time.perf_counter() - began)
+        queries.append(len(context))
+        statuses.append(response.status_code)
+    return summarize(latencies, queries, time.perf_counter() - start,
+                     statuses)
+
+
+def run_benchmarks(questions: int = 100, choices: int = 4, votes: int = 50,
+                   requests: int = 100, warmup: int = 10,
+                   scenarios=SCENARIOS, seed: int = 0) -> dict:
+    """
+    Builds the dataset in the current database and benchmarks each
+    scenario against it, rate limits turned off.
+
+    Returns:
+        dict: The settings of the run and the measures of each scenario,
+        ready to be dumped as JSON.
+    """
+    cache.clear()
+    dataset = build_dataset(questions, choices, votes, seed)
+    if not dataset['open_questions'] and \
+            {'detail', 'results', 'vote'} & set(scenarios):
+        raise ValueError("The dataset has no open poll with choices.")
+    sender = _Requests(dataset, seed)
+    report = {
+        'meta': {
+            'dataset': {'questions': questions, 'choices': choices,
+                        'votes': votes},
+            'requests': requests,
+            'warmup': warmup,
+            'seed': seed,
+            'async_views': settings.POLLS_ASYNC_VIEWS,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'date': timezone.now().isoformat(),
+        },
+        'scenarios': {},
+    }
+    with override_settings(RATE_LIMITS={}):
+        for name in scenarios:
+            report['scenarios'][name] = run_scenario(getattr(sender, name),
+                                                     requests, warmup)
+    return report
+
+
+def compare(report: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """
+    Compares a report with a baseline report. A scenario regressed when
+    its median or p90 latency grew, or its throughput fell, by more than
+    ``threshold`` (a fraction), or when it ran more queries.
+
+    Returns:
+        list: A description of each regression.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for key in ('p50', 'p90'):
+            old, new = previous['latency_ms'][key], current['latency_ms'][key]
+            if old and new > old * (1 + threshold):
+                regressions.append(
+                    f"{name}: {key} latency {new}ms, was {old}ms "
+                    f"(+{(new / old - 1) * 100:.0f}%)")
+        old, new = previous['throughput'], current['throughput']
+        if old and new < old * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {new}/s, was {old}/s "
+                f"(-{(1 - new / old) * 100:.0f}%)")
+        old, new = previous['queries']['max'], current['queries']['max']
+        if new > old:
+            regressions.append(f"{name}: up to {new} queries, was {old}")
+    return regressions
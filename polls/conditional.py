@@ -0,0 +1,110 @@
+import hashlib
+
+from django.contrib import messages
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from polls.models import CatalogVersion, Question
+from polls.questions import invalidate_questions
+from polls.results import invalidate_results
+
+# the primary key of the one CatalogVersion row
+CATALOG_VERSION_ROW = 1
+
+
+def _catalog_version_query():
+    return CatalogVersion.objects.filter(pk=CATALOG_VERSION_ROW)\
+        .values_list('version', flat=True)
+
+
+def catalog_version() -> int:
+    """
+    Returns the version of the poll catalog, which changes whenever a
+    question or choice is added, edited or deleted. It is read from the
+    database, so an edit made through one process is seen by all.
+    """
+    return _catalog_version_query().first() or 0
+
+
+async def acatalog_version() -> int:
+    """
+    Async version of catalog_version().
+    """
+    return await _catalog_version_query().afirst() or 0
+
+
+def bump_catalog_version() -> None:
+    if not CatalogVersion.objects.filter(pk=CATALOG_VERSION_ROW)\
+            .update(version=F('version') + 1):
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_ROW,
+                                             defaults={'version': 1})
+
+
+def catalog_changed(sender, instance, **kwargs) -> None:
+    """
+    Bumps the catalog version and drops the cached results and details
+    of the question. Receiver of post_save and post_delete of questions
+    and choices.
+    """
+    bump_catalog_version()
+    question_ids = [instance.question_id if sender is not Question
+                    else instance.pk]
+    if sender is not Question:
+        # the results page is last modified when one of its choices is
+        Question.objects.filter(pk__in=question_ids)\
+            .update(modified=timezone.now())
+    invalidate_results(question_ids)
+    invalidate_questions(question_ids)
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+
+def has_messages(request) -> bool:
+    """
+    Returns True if the request has messages waiting to be shown, so its
+    page must be rendered even if nothing else changed.
+    """
+    return bool(len(messages.get_messages(request)))
+
+
+def results_etag(result: dict, version: int) -> str:
+    """
+    Returns the ETag of the results page of a question, given its
+    results and the catalog version.
+    """
+    return _etag('results', result['id'], result['results_version'],
+                 version)
+
+
+def results_last_modified(result: dict):
+    """
+    Returns when the results page of a question last changed: its
+    latest vote, or the latest edit of the question or its choices.
+    """
+    return max(result['results_updated'] or result['pub_date'],
+               result['modified'])
+
+
+def index_etag(request, status: str, cursor: str) -> str:
+    """
+    Returns the ETag of a page of the index: it changes with the user,
+    the page, the catalog and whenever a question is published, opens
+    or closes, as told by the next time one of them will. The catalog
+    version and those times are read in one query, through indexes.
+    """
+    now = timezone.now()
+    published = Question.objects.filter(pub_date__gt=now)\
+        .order_by('pub_date').values_list('pub_date', flat=True)
+    # a poll is open up to its end_date included
+    closing = Question.objects.filter(end_date__gte=now)\
+        .order_by('end_date').values_list('end_date', flat=True)
+    state = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ROW)\
+        .values_list('version', Subquery(published[:1]),
+                     Subquery(closing[:1])).first()
+    if state is None:
+        # the version row is gone, e.g. from a flushed database
+        state = (0, published.first(), closing.first())
+    return _etag('index', request.user.pk, status, cursor, *state)
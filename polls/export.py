@@ -0,0 +1,104 @@
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from polls.models import Choice, Vote, ArchivedVote
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+VOTE_COLUMNS = ['user_id', 'username', 'question_id', 'choice_id',
+                'choice_text']
+RESULT_COLUMNS = ['question_id', 'question_text', 'choice_id',
+                  'choice_text', 'votes', 'total_votes']
+
+# rows read from the database at a time
+CHUNK_SIZE = 2000
+
+
+def parse_date_bound(value: str):
+    """
+    Returns an ISO date or date and time as an aware datetime (a date
+    means its midnight), or None if the value is empty.
+
+    Raises:
+        ValueError: If the value is not a date.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{value!r} is not a date.")
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class _Echo:
+    """ File-like object whose write() returns what it is given,
+    so csv.writer can format one row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _filter_questions(rows, prefix: str, question_ids=None, since=None,
+                      until=None):
+    if question_ids:
+        rows = rows.filter(**{f'{prefix}id__in': question_ids})
+    if since is not None:
+        rows = rows.filter(**{f'{prefix}pub_date__gte': since})
+    if until is not None:
+        rows = rows.filter(**{f'{prefix}pub_date__lt': until})
+    return rows
+
+
+def vote_rows(question_ids=None, since=None, until=None):
+    """
+    Returns the votes (user, question and choice), archived ones
+    included, as tuples in the order of VOTE_COLUMNS, optionally only
+    those on the given questions or on questions published in
+    [since, until).
+    """
+    fields = ['user_id', 'user__username', 'question_id', 'choice_id',
+              'choice__choice_text']
+    live = _filter_questions(Vote.objects.all(), 'question__',
+                             question_ids, since, until)
+    archived = _filter_questions(ArchivedVote.objects.all(), 'question__',
+                                 question_ids, since, until)
+    return live.values_list(*fields).union(
+        archived.values_list(*fields), all=True
+    ).order_by('question_id', 'user_id')
+
+
+def result_rows(question_ids=None, since=None, until=None):
+    """
+    Returns the votes of every choice and the total of its question as
+    tuples in the order of RESULT_COLUMNS, filtered like vote_rows().
+    """
+    rows = _filter_questions(Choice.objects.all(), 'question__',
+                             question_ids, since, until)
+    return rows.order_by('question_id', 'pk').values_list(
+        'question_id', 'question__question_text', 'pk', 'choice_text',
+        'vote_count', 'question__total_votes')
+
+
+def export_lines(rows, columns, export_format: str):
+    """
+    Yields the rows as CSV (with a header) or NDJSON lines, reading them
+    from the database CHUNK_SIZE at a time.
+    """
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield writer.writerow(row)
+    else:
+        for row in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield json.dumps(dict(zip(columns, row))) + '\n'
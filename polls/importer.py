@@ -0,0 +1,313 @@
+import csv
+import itertools
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from polls.conditional import bump_catalog_version
+from polls.models import Question, Choice, Vote
+from polls.questions import invalidate_questions
+from polls.results import invalidate_results
+from polls.search import index_questions
+from polls.voting import rebuild_tallies
+
+# the columns of the CSV variant of the fixture format
+CSV_COLUMNS = ['model', 'pk', 'question_text', 'pub_date', 'end_date',
+               'question', 'choice_text', 'user', 'choice']
+
+
+class CatalogError(ValueError):
+    """ Raised when an object of a poll catalog is not valid. """
+
+
+def iter_json_objects(stream, read_size: int = 1 << 16):
+    """
+    Yields the objects of a JSON array one at a time while reading the
+    stream, so only one object is held in memory however big the file is.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != '[':
+                    raise CatalogError("A catalog must be a JSON array.")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise CatalogError(f"Invalid JSON: {exc.msg}.")
+            else:
+                yield obj
+                continue
+        elif eof:
+            raise CatalogError("The JSON array is not closed.")
+
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_csv_objects(stream):
+    """
+    Yields the rows of a CSV catalog (with the columns in CSV_COLUMNS)
+    as objects of the fixture format.
+    """
+    for row in csv.DictReader(stream):
+        model = row.get('model', '')
+        if model == 'polls.question':
+            names = ['question_text', 'pub_date', 'end_date']
+        elif model == 'polls.choice':
+            names = ['question', 'choice_text']
+        elif model == 'polls.vote':
+            names = ['user', 'question', 'choice']
+        else:
+            names = []
+        yield {
+            'model': model,
+            'pk': row.get('pk') or None,
+            'fields': {name: row[name] for name in names
+                       if row.get(name) not in (None, '')},
+        }
+
+
+def _date(value, name: str, required: bool = False):
+    if value in (None, ''):
+        if required:
+            raise CatalogError(f"{name} is required.")
+        return None
+    date = parse_datetime(str(value))
+    if date is None:
+        raise CatalogError(f"{name} is not a date: {value!r}.")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _id(value, name: str, required: bool = True):
+    if value in (None, ''):
+        if required:
+            raise CatalogError(f"{name} is required.")
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise CatalogError(f"{name} is not an id: {value!r}.")
+
+
+def _text(value, name: str) -> str:
+    if not value:
+        raise CatalogError(f"{name} is required.")
+    if not isinstance(value, str):
+        raise CatalogError(f"{name} is not text: {value!r}.")
+    if len(value) > 200:
+        raise CatalogError(f"{name} is longer than 200 characters.")
+    return value
+
+
+class CatalogImporter:
+    """ Imports questions, choices and votes in the fixture format with
+    bulk inserts, chunk_size objects per transaction.
+
+    Questions and choices are upserted by primary key, so a newer version
+    of a catalog can be imported over an older one. Votes are upserted on
+    their natural key, one vote per user and question. The tallies of the
+    questions touched are recounted at the end.
+
+    The import is not one transaction: when it fails, the chunks written
+    before the error stay, and their tallies, cached results and search
+    documents are brought up to date all the same.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.chunk_size = chunk_size
+        self.counts = {'polls.question': 0, 'polls.choice': 0,
+                       'polls.vote': 0, 'skipped': 0}
+        self._questions = {}
+        self._choices = {}
+        self._votes = []
+        self._choice_questions = {}
+        self._touched_questions = set()
+        self._serial = itertools.count()
+
+    def run(self, objects) -> dict:
+        """
+        Imports the objects and returns how many of each model were
+        imported, how many were skipped and the rows per second.
+
+        Raises:
+            CatalogError: If an object is invalid or cannot be written.
+        """
+        start = time.perf_counter()
+        try:
+            for number, obj in enumerate(objects, 1):
+                try:
+                    self.add(obj)
+                    if self._pending() >= self.chunk_size:
+                        self.flush()
+                except CatalogError as exc:
+                    raise CatalogError(f"Object {number}: {exc}") from exc
+            self.flush()
+        finally:
+            self._finish()
+
+        elapsed = time.perf_counter() - start
+        rows = sum(count for model, count in self.counts.items()
+                   if model != 'skipped')
+        return {**self.counts, 'seconds': round(elapsed, 2),
+                'rows_per_second': round(rows / elapsed) if elapsed else rows}
+
+    def _finish(self) -> None:
+        """
+        Brings everything derived from the questions written so far in
+        step with them.
+        """
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Question, Choice, Vote]):
+                cursor.execute(sql)
+        rebuild_tallies(self._touched_questions)
+        invalidate_results(self._touched_questions)
+        invalidate_questions(self._touched_questions)
+        index_questions(self._touched_questions)
+        bump_catalog_version()
+
+    def add(self, obj: dict) -> None:
+        """
+        Validates one object of the catalog and queues it for insertion.
+        Objects of other models are skipped.
+        """
+        if not isinstance(obj, dict) or not isinstance(obj.get('fields'),
+                                                       dict):
+            raise CatalogError("Every object needs a model and fields.")
+        model = obj.get('model')
+        fields = obj['fields']
+        pk = _id(obj.get('pk'), 'pk', required=False)
+
+        if model == 'polls.question':
+            question = Question(
+                pk=pk,
+                question_text=_text(fields.get('question_text'),
+                                    'question_text'),
+                pub_date=_date(fields.get('pub_date'), 'pub_date', True),
+                end_date=_date(fields.get('end_date'), 'end_date'),
+            )
+            self._questions[pk if pk is not None else self._key()] = question
+        elif model == 'polls.choice':
+            choice = Choice(
+                pk=pk,
+                question_id=_id(fields.get('question'), 'question'),
+                choice_text=_text(fields.get('choice_text'), 'choice_text'),
+            )
+            if pk is not None:
+                self._choice_questions[pk] = choice.question_id
+            self._choices[pk if pk is not None else self._key()] = choice
+        elif model == 'polls.vote':
+            user_id = _id(fields.get('user'), 'user')
+            choice_id = _id(fields.get('choice'), 'choice')
+            question_id = _id(fields.get('question'), 'question',
+                              required=False)
+            self._votes.append((user_id, question_id, choice_id))
+        else:
+            self.counts['skipped'] += 1
+
+    def _key(self) -> tuple:
+        return ('new', next(self._serial))
+
+    def _pending(self) -> int:
+        return len(self._questions) + len(self._choices) + len(self._votes)
+
+    def flush(self) -> None:
+        """
+        Writes the queued objects in one transaction, questions first.
+
+        Raises:
+            CatalogError: If an object refers to one that does not exist.
+        """
+        try:
+            with transaction.atomic():
+                self._upsert(Question, self._questions.values(),
+                             ['question_text', 'pub_date', 'end_date',
+                              'modified'])
+                self._upsert(Choice, self._choices.values(),
+                             ['question', 'choice_text'])
+                self._write_votes()
+        except IntegrityError as exc:
+            raise CatalogError(f"The objects cannot be written: {exc}.") \
+                from exc
+
+        self.counts['polls.question'] += len(self._questions)
+        self.counts['polls.choice'] += len(self._choices)
+        self._touched_questions.update(
+            question.pk for question in self._questions.values()
+            if question.pk is not None)
+        self._touched_questions.update(
+            choice.question_id for choice in self._choices.values())
+        self._questions.clear()
+        self._choices.clear()
+
+    @staticmethod
+    def _upsert(model, objects, update_fields) -> None:
+        with_pk = [obj for obj in objects if obj.pk is not None]
+        without_pk = [obj for obj in objects if obj.pk is None]
+        if with_pk:
+            model.objects.bulk_create(
+                with_pk, update_conflicts=True, unique_fields=['id'],
+                update_fields=update_fields)
+        if without_pk:
+            model.objects.bulk_create(without_pk)
+
+    def _write_votes(self) -> None:
+        if not self._votes:
+            return
+        unknown = {choice_id for _, _, choice_id in self._votes
+                   if choice_id not in self._choice_questions}
+        if unknown:
+            self._choice_questions.update(
+                Choice.objects.filter(pk__in=unknown)
+                .values_list('pk', 'question_id'))
+
+        user_ids = {user_id for user_id, _, _ in self._votes}
+        missing = user_ids - set(get_user_model().objects.filter(
+            pk__in=user_ids).values_list('pk', flat=True))
+        if missing:
+            raise CatalogError(f"User {min(missing)} does not exist.")
+
+        votes = {}
+        for user_id, question_id, choice_id in self._votes:
+            choice_question_id = self._choice_questions.get(choice_id)
+            if choice_question_id is None:
+                raise CatalogError(f"Choice {choice_id} does not exist.")
+            if question_id not in (None, choice_question_id):
+                raise CatalogError(
+                    f"Choice {choice_id} is not a choice of question "
+                    f"{question_id}.")
+            question_id = choice_question_id
+            votes[(user_id, question_id)] = Vote(
+                user_id=user_id, question_id=question_id, choice_id=choice_id)
+
+        Vote.objects.bulk_create(
+            votes.values(), update_conflicts=True,
+            unique_fields=['user', 'question'], update_fields=['choice'])
+        self.counts['polls.vote'] += len(votes)
+        self._touched_questions.update(
+            question_id for _, question_id in votes)
+        self._votes.clear()
@@ -0,0 +1,180 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections
+
+from polls.results import refresh_results
+from polls.voting import apply_votes
+
+logger = logging.getLogger(__name__)
+
+
+class VoteBuffer:
+    """ Collects votes in memory and writes them to the database in
+    batches from a background thread (write-behind).
+
+    Repeated votes of a user on a question are coalesced while they wait,
+    so only the last one is written. The buffer is drained when the
+    process exits.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float,
+                 limit: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.limit = limit
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Starts the background flusher and drains the buffer at exit.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="vote-buffer-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """
+        Stops the background flusher and writes every pending vote.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def submit(self, user_id: int, question_id: int, choice_id: int) -> bool:
+        """
+        Queues a vote to be written by the flusher.
+
+        Returns:
+            bool: False if the buffer is full or stopped, in which case
+            the caller must record the vote itself.
+        """
+        key = (user_id, question_id)
+        with self._lock:
+            if self._stopping.is_set():
+                return False
+            if key not in self._pending and len(self._pending) >= self.limit:
+                return False
+            self._pending.pop(key, None)
+            self._pending[key] = choice_id
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Writes the pending votes, batch_size at a time, each batch in
+        its own transaction. A batch that fails is written again one vote
+        at a time: votes that can never be written (e.g. their user or
+        choice was deleted) are logged and dropped, and votes that hit a
+        transient error are put back, behind any newer vote of the same
+        user on the same question.
+
+        Returns:
+            int: The number of votes written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    keys = list(self._pending)[:self.batch_size]
+                    batch = [(key, self._pending.pop(key)) for key in keys]
+                if not batch:
+                    return written
+
+                try:
+                    question_ids = apply_votes(
+                        (user_id, question_id, choice_id)
+                        for (user_id, question_id), choice_id in batch)
+                    count, failed = len(batch), []
+                except OperationalError:
+                    logger.exception("Could not write %d buffered votes.",
+                                     len(batch))
+                    question_ids, count, failed = set(), 0, batch
+                except Exception:
+                    question_ids, count, failed = \
+                        self._write_one_by_one(batch)
+
+                written += count
+                for question_id in question_ids:
+                    refresh_results(question_id)
+                if failed:
+                    with self._lock:
+                        for key, choice_id in failed:
+                            self._pending.setdefault(key, choice_id)
+                    return written
+
+    @staticmethod
+    def _write_one_by_one(batch: list):
+        """
+        Writes the votes of a failed batch one at a time.
+
+        Returns:
+            tuple: The ids of the questions whose votes changed, the
+            number of votes written and the votes to retry later.
+        """
+        question_ids = set()
+        written = 0
+        for number, ((user_id, question_id), choice_id) \
+                in enumerate(batch):
+            try:
+                question_ids |= apply_votes(
+                    [(user_id, question_id, choice_id)])
+            except OperationalError:
+                logger.exception("Could not write %d buffered votes.",
+                                 len(batch) - number)
+                return question_ids, written, batch[number:]
+            except Exception:
+                logger.exception(
+                    "Dropped the buffered vote of user %s for choice %s "
+                    "of question %s.", user_id, choice_id, question_id)
+            else:
+                written += 1
+        return question_ids, written, []
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Vote buffer flush failed.")
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """
+    Returns the running vote buffer of this process, starting it on first
+    use, or None unless VOTE_INGEST_MODE is "buffered".
+    """
+    global _buffer
+    if settings.VOTE_INGEST_MODE != 'buffered':
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = VoteBuffer(settings.VOTE_BATCH_SIZE,
+                                 settings.VOTE_FLUSH_INTERVAL,
+                                 settings.VOTE_BUFFER_LIMIT)
+            _buffer.start()
+        return _buffer
@@ -0,0 +1,99 @@
+import contextlib
+import contextvars
+import time
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from django.template.backends.django import reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+_current_metrics = contextvars.ContextVar('polls_request_metrics',
+                                          default=None)
+
+
+class RequestMetrics:
+    """ What a request cost: its SQL queries, the time spent in the
+    database and rendering templates, and its wall time, in seconds.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.wall_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper that counts and times each query.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def server_timing(self) -> str:
+        """
+        Returns the metrics as the value of a Server-Timing header.
+        """
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", '
+            f'tpl;dur={self.render_time * 1000:.2f}, '
+            f'total;dur={self.wall_time * 1000:.2f}'
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+            'wall_ms': round(self.wall_time * 1000, 2),
+        }
+
+
+@contextlib.contextmanager
+def measure():
+    """
+    Collects the RequestMetrics of the code run inside the block,
+    on every database connection.
+    """
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.record_query))
+            yield metrics
+    finally:
+        metrics.wall_time = time.perf_counter() - start
+        _current_metrics.reset(token)
+
+
+class TimedTemplate(Template):
+    """ Template that adds its render time to the current metrics. """
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current_metrics.get()
+            if metrics is not None:
+                metrics.render_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """ Django template backend whose templates time their rendering. """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name),
+                                 self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+from django.conf import settings
+
+from polls.results import acached_results
+
+
+class ResultsChannel:
+    """ Shares the results of one question between all the clients
+    streaming them, so each tick reads them once however many clients
+    there are.
+    """
+
+    def __init__(self, question_id: int, interval: float):
+        self.question_id = question_id
+        self.interval = interval
+        self.subscribers = 0
+        self._tick = None
+        self._result = None
+        self._lock = asyncio.Lock()
+
+    def current_tick(self) -> int:
+        return int(time.monotonic() // self.interval)
+
+    async def latest(self):
+        """
+        Returns the results of the question as of the current tick,
+        or None if the question does not exist.
+        """
+        tick = self.current_tick()
+        if self._tick != tick:
+            async with self._lock:
+                if self._tick != tick:
+                    self._result = (await acached_results(
+                        [self.question_id])).get(self.question_id)
+                    self._tick = tick
+        return self._result
+
+    async def wait_next_tick(self) -> None:
+        await asyncio.sleep(
+            self.interval - time.monotonic() % self.interval)
+
+
+_channels = {}
+
+
+def _subscribe(question_id: int) -> ResultsChannel:
+    channel = _channels.get(question_id)
+    if channel is None:
+        channel = ResultsChannel(question_id, settings.LIVE_RESULTS_INTERVAL)
+        _channels[question_id] = channel
+    channel.subscribers += 1
+    return channel
+
+
+def _unsubscribe(channel: ResultsChannel) -> None:
+    channel.subscribers -= 1
+    if channel.subscribers == 0:
+        _channels.pop(channel.question_id, None)
+
+
+def results_delta(result: dict, sent: dict) -> dict:
+    """
+    Returns the compact update of a question's results for a client
+    that was last sent ``sent``: the total and only the votes of the
+    choices that changed since. Updates ``sent`` to match.
+
+    Returns:
+        dict: The update, or None if nothing changed.
+    """
+    changed = {}
+    for choice in result['choices']:
+        key = str(choice['id'])
+        if sent.get(key) != choice['votes']:
+            changed[key] = sent[key] = choice['votes']
+    if not changed and sent.get('total') == result['total_votes']:
+        return None
+    sent['total'] = result['total_votes']
+    return {'total': result['total_votes'], 'choices': changed}
+
+
+async def results_events(question_id: int, once: bool = False):
+    """
+    Yields the results of a question as Server-Sent Events: the full
+    counts first, then at most one delta per LIVE_RESULTS_INTERVAL
+    whenever they change, with a comment as keep-alive in between.
+
+    Args:
+        once: Send only the full counts. The client reconnects after the
+            interval given in the ``retry`` field, which turns the stream
+            into polling where it cannot be kept open.
+    """
+    interval = settings.LIVE_RESULTS_INTERVAL
+    yield f"retry: {int(interval * 1000)}\n\n"
+
+    if once:
+        result = (await acached_results([question_id])).get(question_id)
+        if result is None:
+            yield "event: gone\ndata: {}\n\n"
+        else:
+            yield f"data: {json.dumps(results_delta(result, {}))}\n\n"
+        return
+
+    channel = _subscribe(question_id)
+    try:
+        sent = {}
+        while True:
+            result = await channel.latest()
+            if result is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+
+            update = results_delta(result, sent)
+            if update is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(update)}\n\n"
+            await channel.wait_next_tick()
+    finally:
+        _unsubscribe(channel)
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+
+from polls.bench import SCENARIOS, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    """ Benchmark the polls views on a generated dataset. """
+    help = ("Benchmark the index, detail, results, vote and signup views on "
+            "a temporary database filled with generated polls, print the "
+            "measures as JSON and compare them with a baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questions', type=int, default=100,
+            help="Questions in the dataset (default: 100).")
+        parser.add_argument(
+            '--choices', type=int, default=4,
+            help="Choices of each question (default: 4).")
+        parser.add_argument(
+            '--votes', type=int, default=50,
+            help="Votes on each question, one per voter (default: 50).")
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help="Timed requests per scenario (default: 100).")
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help="Untimed requests before each scenario (default: 10).")
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            help="Only run this scenario (repeatable; default: all).")
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Seed of the generated dataset and requests.")
+        parser.add_argument(
+            '--output', help="Also write the JSON report to this file, "
+                             "e.g. to use it as the next baseline.")
+        parser.add_argument(
+            '--baseline', help="A previous JSON report to compare with.")
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help="Slowdown, as a fraction, that counts as a regression "
+                 "(default: 0.1).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(
+                    f"Cannot read baseline {options['baseline']}: {exc}")
+
+        report = self._run_on_temporary_database(options)
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+
+        if baseline is None:
+            return
+        if baseline.get('meta', {}).get('dataset') != \
+                report['meta']['dataset']:
+            self.stderr.write(self.style.WARNING(
+                "The baseline was measured on another dataset size."))
+        regressions = compare(report, baseline, options['threshold'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f"{len(regressions)} regressions against "
+                               f"{options['baseline']}.")
+        self.stderr.write(self.style.SUCCESS("No regression."))
+
+    @staticmethod
+    def _run_on_temporary_database(options) -> dict:
+        # a throwaway file database, like the real one, never the real one
+        directory = tempfile.mkdtemp(prefix='bench_polls_')
+        test_settings = connections['default'].settings_dict['TEST']
+        old_name = test_settings.get('NAME')
+        if connections['default'].vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            return run_benchmarks(
+                questions=options['questions'], choices=options['choices'],
+                votes=options['votes'], requests=options['requests'],
+                warmup=options['warmup'],
+                scenarios=options['scenario'] or SCENARIOS,
+                seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            test_settings['NAME'] = old_name
+            os.rmdir(directory)
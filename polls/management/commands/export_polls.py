@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls import export
+
+
+class Command(BaseCommand):
+    """ Export the votes or the results of polls as CSV or NDJSON. """
+    help = "Stream the votes or the per-question results as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['votes', 'results'])
+        parser.add_argument('--format', choices=export.EXPORT_FORMATS,
+                            default='csv')
+        parser.add_argument(
+            '--question', type=int, action='append', default=[],
+            help="Only export this question (may be repeated).")
+        parser.add_argument(
+            '--since', help="Only questions published on or after this date.")
+        parser.add_argument(
+            '--until', help="Only questions published before this date.")
+        parser.add_argument(
+            '--output', help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            since = export.parse_date_bound(options['since'])
+            until = export.parse_date_bound(options['until'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['kind'] == 'votes':
+            rows = export.vote_rows(options['question'], since, until)
+            columns = export.VOTE_COLUMNS
+        else:
+            rows = export.result_rows(options['question'], since, until)
+            columns = export.RESULT_COLUMNS
+
+        lines = export.export_lines(rows, columns, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
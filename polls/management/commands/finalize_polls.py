@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from polls.archive import finalize_closed_polls
+
+
+class Command(BaseCommand):
+    """ Snapshot the final results of closed polls. """
+    help = "Write the final results of closed polls and archive their votes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive', action='store_true',
+            help="Also move the votes of finalized polls out of the Vote "
+                 "table into the archive.")
+
+    def handle(self, *args, **options):
+        report = finalize_closed_polls(archive=options['archive'])
+        for question_id in report['finalized']:
+            self.stdout.write(f"Finalized question {question_id}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Finalized {len(report['finalized'])} polls, archived "
+            f"{report['archived_votes']} votes."))
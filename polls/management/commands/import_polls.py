@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.importer import CatalogError, CatalogImporter
+from polls.importer import iter_csv_objects, iter_json_objects
+
+
+class Command(BaseCommand):
+    """ Import a poll catalog in bulk, streaming the file. """
+    help = ("Import questions, choices and votes from a JSON fixture or "
+            "CSV file, updating the objects that already exist.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The catalog file to import.")
+        parser.add_argument(
+            '--format', choices=['json', 'csv'],
+            help="The format of the file (default: from its extension).")
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help="Objects written per transaction (default: 5000).")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError("Give --format json or csv.")
+
+        try:
+            with path.open(newline='', encoding='utf-8') as stream:
+                if file_format == 'csv':
+                    objects = iter_csv_objects(stream)
+                else:
+                    objects = iter_json_objects(stream)
+                report = CatalogImporter(options['chunk_size']).run(objects)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except CatalogError as exc:
+            raise CommandError(f"Invalid catalog {path}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['polls.question']} questions, "
+            f"{report['polls.choice']} choices and {report['polls.vote']} "
+            f"votes ({report['skipped']} objects skipped) in "
+            f"{report['seconds']}s, {report['rows_per_second']} rows/s."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.search import SearchUnavailable, rebuild_search_index
+
+
+class Command(BaseCommand):
+    """ Rebuild the full-text search index of the polls. """
+    help = ("Rebuild the full-text search index of questions and choices "
+            "from the database.")
+
+    def handle(self, *args, **options):
+        try:
+            count = rebuild_search_index()
+        except SearchUnavailable as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} questions."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.voting import rebuild_tallies
+
+
+class Command(BaseCommand):
+    """ Rebuild and verify the stored vote tallies from the Vote table. """
+    help = "Recount the stored vote tallies of choices and questions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'question_ids', nargs='*', type=int,
+            help="Only recount these questions (default: all).")
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only verify the tallies; fail if any of them is stale.")
+
+    def handle(self, *args, **options):
+        question_ids = options['question_ids'] or None
+        mismatches = rebuild_tallies(question_ids, fix=not options['check'])
+
+        for model, pk, stored, actual in mismatches:
+            self.stdout.write(
+                f"{model} {pk}: stored {stored}, counted {actual}")
+
+        if options['check'] and mismatches:
+            raise CommandError(f"{len(mismatches)} tallies are stale.")
+        if mismatches:
+            self.stdout.write(self.style.SUCCESS(
+                f"Fixed {len(mismatches)} stale tallies."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All tallies are correct."))
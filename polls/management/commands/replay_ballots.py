@@ -0,0 +1,46 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.ballots import REJECTED, submit_ballots
+from polls.importer import CatalogError, iter_json_objects
+
+
+class Command(BaseCommand):
+    """ Record a batch of ballots collected offline. """
+    help = ("Validate and record ballots collected offline, from a JSON "
+            "array or a CSV file with user, question, choice and timestamp "
+            "columns.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The ballots file.")
+        parser.add_argument(
+            '--format', choices=['json', 'csv'],
+            help="The format of the file (default: from its extension).")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError("Give --format json or csv.")
+
+        try:
+            with path.open(newline='', encoding='utf-8') as stream:
+                if file_format == 'csv':
+                    ballots = list(csv.DictReader(stream))
+                else:
+                    ballots = list(iter_json_objects(stream))
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except CatalogError as exc:
+            raise CommandError(f"Invalid ballots file {path}: {exc}")
+
+        report = submit_ballots(ballots)
+        for number, result in enumerate(report['results'], start=1):
+            if result['status'] == REJECTED:
+                self.stderr.write(f"Ballot {number}: {result['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Accepted {report['accepted']} ballots, "
+            f"{report['superseded']} superseded by a later vote, "
+            f"{report['rejected']} rejected."))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from polls.scheduler import PollScheduler, cache_is_shared
+
+
+class Command(BaseCommand):
+    """ Long-running worker firing the open and close hooks of polls. """
+    help = "Warm the caches of polls as they open and finalize them as " \
+           "they close."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--open-lead', type=float, default=60,
+            help="Seconds before a poll opens to warm its caches.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=5,
+            help="Longest wait, in seconds, between two checks for "
+                 "edited questions.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run the hooks that are due and exit.")
+        parser.add_argument(
+            '--allow-local-cache', action='store_true',
+            help="Run even though the cache is local to this process, "
+                 "only to finalize polls as they close.")
+
+    def handle(self, *args, **options):
+        # the hooks warm and drop cache entries for the web workers
+        if not cache_is_shared():
+            if not options['allow_local_cache']:
+                raise CommandError(
+                    "The cache is local to each process, so the web "
+                    "workers would never see what the scheduler warms or "
+                    "drops. Set CACHE_BACKEND to a shared cache (e.g. "
+                    "Redis or Memcached), or pass --allow-local-cache.")
+            self.stderr.write(self.style.WARNING(
+                "The cache is local to this process: polls are finalized "
+                "but the caches of the web workers are not warmed or "
+                "refreshed."))
+        scheduler = PollScheduler(open_lead=options['open_lead'])
+        while True:
+            close_old_connections()
+            now = timezone.now()
+            scheduler.refresh(now)
+            for kind, question_id in scheduler.run_due(now):
+                self.stdout.write(f"Ran the {kind} hook of question "
+                                  f"{question_id}")
+            if options['once']:
+                return
+
+            wait = options['poll_interval']
+            next_run = scheduler.next_run()
+            if next_run is not None:
+                wait = min(wait, (next_run - timezone.now()).total_seconds())
+            time.sleep(max(wait, 0.01))
@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """ Copy the primary SQLite database onto the read replica. """
+    help = "Copy the database onto the read replica, once or repeatedly."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Copy again every this many seconds (default: once).")
+        parser.add_argument(
+            '--pages', type=int, default=1024,
+            help="Database pages copied per step, so writers are not "
+                 "blocked for the whole copy.")
+
+    def handle(self, *args, **options):
+        alias = settings.POLLS_READ_REPLICA
+        if not alias:
+            raise CommandError("No replica: set REPLICA_DATABASE_NAME.")
+        primary = connections['default'].settings_dict
+        replica = connections[alias].settings_dict
+        if primary['ENGINE'] != replica['ENGINE'] \
+                or connections['default'].vendor != 'sqlite':
+            raise CommandError("sync_replica only copies SQLite databases.")
+
+        while True:
+            start = time.perf_counter()
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target, pages=options['pages'])
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {primary['NAME']} to {replica['NAME']} in "
+                f"{time.perf_counter() - start:.2f}s."))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,123 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from polls.instrumentation import measure
+from polls.routers import use_replica
+
+logger = logging.getLogger('polls.metrics')
+
+# the views whose cost is measured
+INSTRUMENTED_VIEWS = {'polls:index', 'polls:detail', 'polls:results',
+                      'polls:vote', 'polls:search'}
+
+# the views that read from the replica, and those after which the user
+# reads from the primary for REPLICA_READ_YOUR_WRITES seconds
+REPLICA_VIEWS = {'polls:index', 'polls:results', 'polls:results_json',
+                 'polls:question_results_json', 'polls:api_questions',
+                 'polls:api_question', 'polls:search'}
+WRITE_VIEWS = {'polls:vote', 'polls:api_ballots', 'signup'}
+READ_YOUR_WRITES_COOKIE = 'polls_primary'
+
+
+class RequestMetricsMiddleware:
+    """ Measures the SQL queries, database time, template render time and
+    wall time of each request to the polls views. Adds them to the
+    response as a Server-Timing header and logs them as one JSON line,
+    at warning level when the view went over its query budget in
+    POLLS_QUERY_BUDGETS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with measure() as metrics:
+            response = self.get_response(request)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        with measure() as metrics:
+            response = await self.get_response(request)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        match = request.resolver_match
+        if match is None or match.view_name not in INSTRUMENTED_VIEWS:
+            return response
+
+        response['Server-Timing'] = metrics.server_timing()
+        budget = settings.POLLS_QUERY_BUDGETS.get(match.view_name)
+        over_budget = budget is not None and metrics.queries > budget
+        record = {
+            'view': match.view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+            'query_budget': budget,
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO,
+                   json.dumps(record), extra={'metrics': record})
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """ Sends the reads of the REPLICA_VIEWS to the read replica, unless
+    the user wrote something in the last REPLICA_READ_YOUR_WRITES
+    seconds, so the page after a vote always shows it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        view_name = self.view_name(request)
+        if self.reads_from_replica(request, view_name):
+            with use_replica():
+                return self.get_response(request)
+        return self.mark_write(view_name, self.get_response(request))
+
+    async def __acall__(self, request):
+        view_name = self.view_name(request)
+        if self.reads_from_replica(request, view_name):
+            with use_replica():
+                return await self.get_response(request)
+        return self.mark_write(view_name, await self.get_response(request))
+
+    @staticmethod
+    def view_name(request) -> str:
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return ''
+
+    @staticmethod
+    def reads_from_replica(request, view_name: str) -> bool:
+        return (bool(settings.POLLS_READ_REPLICA)
+                and view_name in REPLICA_VIEWS
+                and READ_YOUR_WRITES_COOKIE not in request.COOKIES)
+
+    @staticmethod
+    def mark_write(view_name: str, response):
+        if settings.POLLS_READ_REPLICA and view_name in WRITE_VIEWS \
+                and response.status_code < 400:
+            response.set_cookie(READ_YOUR_WRITES_COOKIE, '1',
+                                max_age=settings.REPLICA_READ_YOUR_WRITES,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.5 on 2023-10-02 10:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_votes(apps, schema_editor):
+    """Fill in the new tallies from the existing votes."""
+    Question = apps.get_model("polls", "Question")
+    Choice = apps.get_model("polls", "Choice")
+
+    totals = {}
+    choices = list(Choice.objects.annotate(actual=Count("vote")))
+    for choice in choices:
+        choice.vote_count = choice.actual
+        totals[choice.question_id] = \
+            totals.get(choice.question_id, 0) + choice.actual
+    Choice.objects.bulk_update(choices, ["vote_count"])
+
+    questions = list(Question.objects.filter(pk__in=totals))
+    for question in questions:
+        question.total_votes = totals[question.pk]
+    Question.objects.bulk_update(questions, ["total_votes"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0003_remove_choice_votes_vote"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="choice",
+            name="vote_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                verbose_name="votes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="total_votes",
+            field=models.PositiveIntegerField(
+                default=0,
+                verbose_name="total votes"
+            ),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
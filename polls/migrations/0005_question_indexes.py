@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2023-10-04 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0004_vote_tallies"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="question",
+            name="end_date",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="end date"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="question",
+            index=models.Index(
+                fields=["pub_date", "id"],
+                name="polls_question_pub_date_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.5 on 2023-10-06 13:25
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_question(apps, schema_editor):
+    """Copy the question of each vote from its choice, drop all but the
+    latest vote of a user on a question and recount the tallies.
+    """
+    Question = apps.get_model("polls", "Question")
+    Choice = apps.get_model("polls", "Choice")
+    Vote = apps.get_model("polls", "Vote")
+
+    Vote.objects.update(question_id=Subquery(
+        Choice.objects.filter(pk=OuterRef("choice_id")).values("question_id")
+    ))
+
+    duplicates = Vote.objects.values("user_id", "question_id")\
+        .annotate(votes=Count("id"), latest=Max("id"))\
+        .filter(votes__gt=1)
+    for duplicate in duplicates:
+        Vote.objects.filter(
+            user_id=duplicate["user_id"],
+            question_id=duplicate["question_id"],
+            id__lt=duplicate["latest"],
+        ).delete()
+
+    totals = {}
+    choices = list(Choice.objects.annotate(actual=Count("vote")))
+    for choice in choices:
+        choice.vote_count = choice.actual
+        totals[choice.question_id] = \
+            totals.get(choice.question_id, 0) + choice.actual
+    Choice.objects.bulk_update(choices, ["vote_count"])
+
+    questions = list(Question.objects.all())
+    for question in questions:
+        question.total_votes = totals.get(question.pk, 0)
+    Question.objects.bulk_update(questions, ["total_votes"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0005_question_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vote",
+            name="question",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="polls.question"
+            ),
+        ),
+        migrations.RunPython(backfill_question, migrations.RunPython.noop),
+    ]
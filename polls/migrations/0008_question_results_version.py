@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2023-10-12 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0007_vote_one_per_question"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="results_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                verbose_name="results version"
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="results_updated",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name="results updated"
+            ),
+        ),
+    ]
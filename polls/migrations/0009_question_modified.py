@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2023-10-13 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0008_question_results_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="modified",
+            field=models.DateTimeField(
+                auto_now=True,
+                verbose_name="modified"
+            ),
+        ),
+    ]
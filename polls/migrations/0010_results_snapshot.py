@@ -0,0 +1,108 @@
+# Generated by Django 4.2.5 on 2023-10-16 11:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("polls", "0009_question_modified"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="finalized_at",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name="finalized at"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ResultSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("choice_text", models.CharField(max_length=200)),
+                ("votes", models.PositiveIntegerField(verbose_name="votes")),
+                (
+                    "choice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="polls.choice"
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="polls.question"
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedVote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "choice",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="polls.choice"
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="polls.question"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="resultsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("question", "choice"),
+                name="polls_snapshot_one_per_choice"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="archivedvote",
+            constraint=models.UniqueConstraint(
+                fields=("question", "user"),
+                name="polls_archivedvote_one_per_user"
+            ),
+        ),
+    ]
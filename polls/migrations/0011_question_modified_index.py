@@ -0,0 +1,22 @@
+# Generated by Django 4.2.5 on 2023-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0010_results_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="question",
+            name="modified",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                verbose_name="modified"
+            ),
+        ),
+    ]
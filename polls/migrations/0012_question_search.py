@@ -0,0 +1,39 @@
+# Generated by Django 4.2.5 on 2023-10-19 10:05
+
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    # FTS5 is SQLite only, other databases go without full-text search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE polls_question_search USING fts5("
+        "question_text, choice_text, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO polls_question_search "
+        "(rowid, question_text, choice_text) "
+        "SELECT q.id, q.question_text, "
+        "COALESCE((SELECT group_concat(c.choice_text, ' ') "
+        "FROM polls_choice c WHERE c.question_id = q.id), '') "
+        "FROM polls_question q"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS polls_question_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0011_question_modified_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.5 on 2023-10-20 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0012_question_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vote",
+            name="cast_at",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name="cast at"
+            ),
+        ),
+    ]
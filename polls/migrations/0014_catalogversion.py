@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2023-10-21 10:05
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    """Create the one row of the catalog version."""
+    CatalogVersion = apps.get_model("polls", "CatalogVersion")
+    CatalogVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0013_vote_cast_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        verbose_name="version"
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -1,17 +1,89 @@
 import datetime
 
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import BooleanField, Case, Q, Value, When
 from django.utils import timezone
 
+# the largest primary key the database can store, a signed 64-bit integer
+MAX_ID = 2 ** 63 - 1
+
+
+class QuestionQuerySet(models.QuerySet):
+    """ QuerySet of questions that can tell open polls from closed ones
+    in the database, as of one snapshot of the current time.
+    """
+
+    @staticmethod
+    def open_condition(now) -> Q:
+        """
+        Returns the condition a question must meet to accept votes
+        at ``now``, the same rule as Question.can_vote().
+        """
+        return Q(pub_date__lte=now) & (
+            Q(end_date__isnull=True) | Q(end_date__gte=now))
+
+    def published(self, now=None):
+        """
+        Returns the questions published at ``now`` (default: the current
+        time).
+        """
+        return self.filter(pub_date__lte=now or timezone.now())
+
+    def with_status(self, now=None):
+        """
+        Annotates each question with ``is_open``, True if it accepts
+        votes at ``now`` (default: the current time).
+        """
+        return self.annotate(is_open=Case(
+            When(self.open_condition(now or timezone.now()),
+                 then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ))
+
+    def open(self, now=None):
+        """
+        Returns the questions that accept votes at ``now``.
+        """
+        return self.filter(self.open_condition(now or timezone.now()))
+
+    def closed(self, now=None):
+        """
+        Returns the published questions that no longer accept votes
+        at ``now``.
+        """
+        now = now or timezone.now()
+        return self.published(now).exclude(self.open_condition(now))
+
 
 class Question(models.Model):
     """  Represents a poll question and contains the question text,
     publish date, and end date for voting.
     """
-    objects = None
+    objects = QuestionQuerySet.as_manager()
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField("date published")
-    end_date = models.DateTimeField("end date", null=True, blank=True)
+    end_date = models.DateTimeField(
+        "end date", null=True, blank=True, db_index=True)
+    total_votes = models.PositiveIntegerField("total votes", default=0)
+    # bumped whenever the votes change, for conditional GETs of the results
+    results_version = models.PositiveIntegerField(
+        "results version", default=0)
+    results_updated = models.DateTimeField(
+        "results updated", null=True, blank=True)
+    # when the question itself was last edited, not its votes
+    modified = models.DateTimeField("modified", auto_now=True,
+                                    db_index=True)
+    # when the final results were written to ResultSnapshot
+    finalized_at = models.DateTimeField("finalized at", null=True,
+                                        blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pub_date", "id"],
+                         name="polls_question_pub_date_id"),
+        ]
 
     def was_published_recently(self) -> bool:
         """
@@ -23,22 +95,23 @@ class Question(models.Model):
     def __str__(self) -> str:
         return self.question_text
 
-    def is_published(self) -> bool:
+    def is_published(self, now=None) -> bool:
         """
-        Returns True if the question is published.
+        Returns True if the question is published at ``now``
+        (default: the current time).
         """
-        now = timezone.now()
+        now = now or timezone.now()
         return now >= self.pub_date
 
-    def can_vote(self) -> bool:
+    def can_vote(self, now=None) -> bool:
         """
-        Returns True if the question is published and the current time is
-        between the publication date and end date.
+        Returns True if the question is published and ``now`` (default: the
+        current time) is between the publication date and end date.
         """
+        now = now or timezone.now()
         if self.end_date is None:
-            return self.is_published()
+            return self.is_published(now)
 
-        now = timezone.now()
         return self.pub_date <= now <= self.end_date
 
 
@@ -46,19 +119,102 @@ class Choice(models.Model):
     """ Represents a choice for a poll question. """
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
+    vote_count = models.PositiveIntegerField("votes", default=0)
 
     @property
     def votes(self) -> int:
-        return Vote.objects.filter(choice=self).count()
+        """
+        Returns the stored tally of votes for this choice.
+        The tally is kept up to date by polls.voting.cast_vote().
+        """
+        return self.vote_count
 
     def __str__(self) -> str:
         return self.choice_text
 
 
 class Vote(models.Model):
-    """ Records a vote of a Choice ny a User. """
+    """ Records a vote of a Choice ny a User.
+    A user has at most one vote on each question.
+    """
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    # when the vote was cast, so an older ballot replayed later cannot
+    # replace it; unknown for votes recorded before it was kept
+    cast_at = models.DateTimeField("cast at", null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "question"],
+                                    name="polls_vote_one_per_question"),
+        ]
+
+    def clean(self):
+        if self.question_id is not None and self.choice_id is not None \
+                and self.choice.question_id != self.question_id:
+            raise ValidationError(
+                {'choice': "The choice is not a choice of the question."})
+
+    def save(self, *args, **kwargs):
+        if self.question_id is None:
+            self.question_id = self.choice.question_id
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.user.username} voted for {self.choice.choice_text}"
+
+
+class ResultSnapshot(models.Model):
+    """ The final votes of a choice of a closed poll, written once when
+    the poll is finalized (see polls.archive).
+    """
+    # looked up through the (question, choice) index
+    question = models.ForeignKey(Question, on_delete=models.CASCADE,
+                                 db_index=False)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    choice_text = models.CharField(max_length=200)
+    votes = models.PositiveIntegerField("votes")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question", "choice"],
+                                    name="polls_snapshot_one_per_choice"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.choice_text}: {self.votes}"
+
+
+class ArchivedVote(models.Model):
+    """ A vote on a finalized poll, moved out of the Vote table.
+    Only the (question, user) index is kept.
+    """
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE,
+                             db_index=False)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE,
+                                 db_index=False)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE,
+                               db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question", "user"],
+                                    name="polls_archivedvote_one_per_user"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Archived vote of user {self.user_id} " \
+               f"for choice {self.choice_id}"
+
+
+class CatalogVersion(models.Model):
+    """ The version of the poll catalog, in a single row bumped whenever
+    a question or choice is added, edited or deleted (see
+    polls.conditional). Kept in the database so that every process
+    builds the same ETags.
+    """
+    version = models.PositiveBigIntegerField("version", default=0)
+
+    def __str__(self) -> str:
+        return f"Catalog version {self.version}"
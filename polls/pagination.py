@@ -0,0 +1,82 @@
+import base64
+import binascii
+import datetime
+
+from django.db.models import Q
+
+from polls.models import MAX_ID
+
+
+def encode_cursor(question) -> str:
+    """
+    Returns an opaque cursor pointing just after the given question,
+    or values() row with its pub_date and id, in the (-pub_date, -id)
+    ordering.
+    """
+    if isinstance(question, dict):
+        pub_date, pk = question['pub_date'], question['id']
+    else:
+        pub_date, pk = question.pub_date, question.pk
+    raw = f"{pub_date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns the (pub_date, id) a cursor points after, or None if the
+    cursor is missing or malformed. Cursors come from the query string,
+    so one that encode_cursor() cannot have made (a naive date, an id
+    the database cannot hold) is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date, pk = datetime.datetime.fromisoformat(pub_date), int(pk)
+        if pub_date.utcoffset() is None or not 1 <= pk <= MAX_ID:
+            return None
+        return pub_date.astimezone(datetime.timezone.utc), pk
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        return None
+
+
+def _page_query(questions, cursor: str, page_size: int):
+    questions = questions.order_by('-pub_date', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        pub_date, pk = position
+        questions = questions.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+    return questions[:page_size + 1]
+
+
+def _split_page(page: list, page_size: int):
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+def keyset_page(questions, cursor: str, page_size: int):
+    """
+    Returns one page of questions, newest first, starting after the
+    cursor. Seeks with the (pub_date, id) index, so every page costs
+    the same as the first one.
+
+    Returns:
+        tuple: The questions on the page and the cursor of the next page,
+        which is None on the last page.
+    """
+    page = list(_page_query(questions, cursor, page_size))
+    return _split_page(page, page_size)
+
+
+async def akeyset_page(questions, cursor: str, page_size: int):
+    """
+    Async version of keyset_page().
+    """
+    page = [question async for question
+            in _page_query(questions, cursor, page_size)]
+    return _split_page(page, page_size)
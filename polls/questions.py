@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from polls.models import Question
+
+
+def _cache_key(question_id: int) -> str:
+    return f'polls:question:{question_id}'
+
+
+def _load(question_id: int):
+    question = Question.objects.filter(pk=question_id).first()
+    if question is None:
+        return None
+    return question, list(question.choice_set.order_by('pk'))
+
+
+def cached_question(question_id: int):
+    """
+    Returns a question and the list of its choices for its detail page,
+    from the cache when it can.
+
+    Returns:
+        tuple: (question, choices), or None if the question does not
+        exist.
+    """
+    entry = cache.get(_cache_key(question_id))
+    if entry is None:
+        entry = warm_question(question_id)
+    return entry
+
+
+async def acached_question(question_id: int):
+    """
+    Async version of cached_question().
+    """
+    entry = await cache.aget(_cache_key(question_id))
+    if entry is None:
+        question = await Question.objects.filter(pk=question_id).afirst()
+        if question is None:
+            return None
+        entry = (question, [choice async for choice
+                            in question.choice_set.order_by('pk')])
+        await cache.aset(_cache_key(question_id), entry,
+                         settings.QUESTION_CACHE_TTL)
+    return entry
+
+
+def warm_question(question_id: int):
+    """
+    Loads a question and its choices into the cache and returns them,
+    or None if the question does not exist.
+    """
+    entry = _load(question_id)
+    if entry is not None:
+        cache.set(_cache_key(question_id), entry,
+                  settings.QUESTION_CACHE_TTL)
+    return entry
+
+
+def invalidate_questions(question_ids) -> None:
+    """
+    Drops the cached questions and choices of the given questions.
+    """
+    cache.delete_many([_cache_key(question_id)
+                       for question_id in question_ids])
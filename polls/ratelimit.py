@@ -0,0 +1,205 @@
+import collections
+import functools
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# seconds in each unit of a rate such as "30/m"
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# the most buckets the local backend keeps, least recently used dropped
+LOCAL_BUCKETS_LIMIT = 10000
+
+# requests rejected in this process, by scope and key kind
+_rejected = collections.Counter()
+_rejected_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate: str):
+    """
+    Returns the capacity and the refill speed (tokens per second) of a
+    rate such as "30/m": bursts of up to 30 requests, refilled at 30 a
+    minute.
+
+    Raises:
+        ValueError: If the rate is not in that form.
+    """
+    try:
+        count, unit = rate.split('/')
+        capacity = int(count)
+        seconds = RATE_UNITS.get(unit.strip()) or float(unit)
+    except ValueError:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '30/m'.")
+    if capacity < 1 or seconds <= 0:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '30/m'.")
+    return capacity, capacity / seconds
+
+
+def _take(state, capacity: int, per_second: float, now: float):
+    tokens, stamp = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBuckets:
+    """ Token buckets kept in the memory of this process. """
+
+    def __init__(self):
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: str) -> float:
+        """
+        Takes a token from the bucket of the key.
+
+        Returns:
+            float: 0 if the request may go ahead, else the seconds until
+            the bucket holds a token again.
+        """
+        capacity, per_second = parse_rate(rate)
+        with self._lock:
+            state, wait = _take(self._buckets.get(key), capacity, per_second,
+                                time.monotonic())
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > LOCAL_BUCKETS_LIMIT:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """ Token buckets kept in the default cache, shared by the processes
+    using it. Concurrent requests of one key may both take the last token,
+    which is close enough for a limiter.
+    """
+
+    def take(self, key: str, rate: str) -> float:
+        capacity, per_second = parse_rate(rate)
+        cache_key = f'polls:ratelimit:{key}'
+        state, wait = _take(cache.get(cache_key), capacity, per_second,
+                            time.time())
+        cache.set(cache_key, state, math.ceil(capacity / per_second) + 1)
+        return wait
+
+    def clear(self) -> None:
+        pass
+
+
+_local_buckets = LocalBuckets()
+_cache_buckets = CacheBuckets()
+
+
+def get_buckets():
+    """
+    Returns the buckets of the RATE_LIMIT_BACKEND, "local" or "cache".
+    """
+    if settings.RATE_LIMIT_BACKEND == 'cache':
+        return _cache_buckets
+    return _local_buckets
+
+
+def _client_keys(request) -> dict:
+    keys = {'ip': request.META.get('REMOTE_ADDR', '')}
+    # the session cookie stands for the user without loading either
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        keys['user'] = session_key
+    return keys
+
+
+def check_rate(request, scope: str) -> float:
+    """
+    Takes a token from each bucket of the request in RATE_LIMITS[scope],
+    one per client IP and one per user session.
+
+    Returns:
+        float: 0 if the request may go ahead, else the seconds the client
+        should wait.
+    """
+    buckets = get_buckets()
+    limits = settings.RATE_LIMITS.get(scope, {})
+    for kind, key in _client_keys(request).items():
+        rate = limits.get(kind)
+        if not rate:
+            continue
+        wait = buckets.take(f'{scope}:{kind}:{key}', rate)
+        if wait:
+            with _rejected_lock:
+                _rejected[f'{scope}:{kind}'] += 1
+            logger.warning("Rate limited %s by %s %s.", scope, kind,
+                           key if kind == 'ip' else '(session)')
+            return wait
+    return 0.0
+
+
+def too_many_requests(wait: float) -> HttpResponse:
+    response = HttpResponse("Too many requests, please try again later.",
+                            status=429, content_type='text/plain')
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit(scope: str, methods=('POST',)):
+    """
+    View decorator answering 429 Too Many Requests, before the view does
+    any work, to clients over their rate in RATE_LIMITS[scope]. Only
+    requests with the given methods are limited. Works on sync and async
+    views; put it above login_required.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    if settings.RATE_LIMIT_BACKEND == 'cache':
+                        wait = await sync_to_async(check_rate)(request,
+                                                               scope)
+                    else:
+                        wait = check_rate(request, scope)
+                    if wait:
+                        return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check_rate(request, scope)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def rate_limit_stats() -> dict:
+    """
+    Returns how many requests were rejected in this process, keyed by
+    scope and kind of key, e.g. ``{'vote:user': 3}``.
+    """
+    with _rejected_lock:
+        return dict(_rejected)
+
+
+def reset_rate_limits() -> None:
+    """
+    Empties the local buckets and the rejection counters.
+    """
+    _local_buckets.clear()
+    with _rejected_lock:
+        _rejected.clear()
@@ -0,0 +1,194 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from polls.models import Question
+
+# hit and miss counters of the results cache in this process
+_cache_stats = {'hits': 0, 'misses': 0}
+_cache_stats_lock = threading.Lock()
+
+
+def percentage(votes: int, total: int) -> float:
+    """
+    Returns the share of the total votes as a percentage,
+    rounded to one decimal place.
+    """
+    if not total:
+        return 0.0
+    return round(votes * 100 / total, 1)
+
+
+def _results_rows(question_ids, published_before=None):
+    """
+    Returns the results of the open polls, from the tallies, together
+    with those of the finalized ones, from their snapshot.
+    """
+    questions = Question.objects.filter(pk__in=question_ids)
+    if published_before is not None:
+        questions = questions.filter(pub_date__lte=published_before)
+    fields = ['pk', 'question_text', 'pub_date', 'total_votes',
+              'results_version', 'results_updated', 'modified',
+              'finalized_at']
+    live = questions.filter(finalized_at__isnull=True).values_list(
+        *fields, 'choice__pk', 'choice__choice_text', 'choice__vote_count')
+    final = questions.filter(finalized_at__isnull=False).values_list(
+        *fields, 'resultsnapshot__choice_id', 'resultsnapshot__choice_text',
+        'resultsnapshot__votes')
+    return live.union(final, all=True).order_by('pk', 'choice__pk')
+
+
+def _collect_results(rows) -> dict:
+    results = {}
+    for (question_id, question_text, pub_date, total, version, updated,
+         modified, finalized_at, choice_id, choice_text, votes) in rows:
+        result = results.setdefault(question_id, {
+            'id': question_id,
+            'question_text': question_text,
+            'pub_date': pub_date,
+            'total_votes': total,
+            'results_version': version,
+            'results_updated': updated,
+            'modified': modified,
+            'finalized_at': finalized_at,
+            'choices': [],
+        })
+        if choice_id is not None:
+            result['choices'].append({
+                'id': choice_id,
+                'choice_text': choice_text,
+                'votes': votes,
+                'percentage': percentage(votes, total),
+            })
+    return results
+
+
+def question_results(question_ids, published_before=None) -> dict:
+    """
+    Collects the results of the given questions with one query.
+
+    Args:
+        question_ids: The ids of the questions to collect.
+        published_before: If given, skip questions published after it.
+
+    Returns:
+        dict: The results of each question found, keyed by its id. Each
+        result holds the question text, the total number of votes and
+        the choices with their votes and percentage of the total.
+    """
+    return _collect_results(_results_rows(question_ids, published_before))
+
+
+async def aquestion_results(question_ids, published_before=None) -> dict:
+    """
+    Async version of question_results().
+    """
+    rows = _results_rows(question_ids, published_before)
+    return _collect_results([row async for row in rows])
+
+
+def _cache_key(question_id: int) -> str:
+    return f'polls:results:{question_id}'
+
+
+def _count_lookups(hits: int, misses: int) -> None:
+    with _cache_stats_lock:
+        _cache_stats['hits'] += hits
+        _cache_stats['misses'] += misses
+
+
+def _published(results: dict, published_before) -> dict:
+    if published_before is None:
+        return results
+    return {question_id: result for question_id, result in results.items()
+            if result['pub_date'] <= published_before}
+
+
+def cached_results(question_ids, published_before=None) -> dict:
+    """
+    Same as question_results(), but serves each question from the
+    results cache when it can and caches the ones it had to collect.
+    """
+    keys = {_cache_key(question_id): question_id
+            for question_id in question_ids}
+    results = {keys[key]: result
+               for key, result in cache.get_many(keys).items()}
+
+    missing = [question_id for question_id in keys.values()
+               if question_id not in results]
+    _count_lookups(len(results), len(missing))
+
+    if missing:
+        collected = question_results(missing)
+        cache.set_many(
+            {_cache_key(question_id): result
+             for question_id, result in collected.items()},
+            settings.RESULTS_CACHE_TTL)
+        results.update(collected)
+    return _published(results, published_before)
+
+
+async def acached_results(question_ids, published_before=None) -> dict:
+    """
+    Async version of cached_results().
+    """
+    keys = {_cache_key(question_id): question_id
+            for question_id in question_ids}
+    found = await cache.aget_many(keys)
+    results = {keys[key]: result for key, result in found.items()}
+
+    missing = [question_id for question_id in keys.values()
+               if question_id not in results]
+    _count_lookups(len(results), len(missing))
+
+    if missing:
+        collected = await aquestion_results(missing)
+        await cache.aset_many(
+            {_cache_key(question_id): result
+             for question_id, result in collected.items()},
+            settings.RESULTS_CACHE_TTL)
+        results.update(collected)
+    return _published(results, published_before)
+
+
+def refresh_results(question_id: int) -> None:
+    """
+    Recollects the results of a question and writes them to the results
+    cache. Called after its votes change.
+    """
+    result = question_results([question_id]).get(question_id)
+    if result is None:
+        cache.delete(_cache_key(question_id))
+    else:
+        cache.set(_cache_key(question_id), result,
+                  settings.RESULTS_CACHE_TTL)
+
+
+async def arefresh_results(question_id: int) -> None:
+    """
+    Async version of refresh_results().
+    """
+    result = (await aquestion_results([question_id])).get(question_id)
+    if result is None:
+        await cache.adelete(_cache_key(question_id))
+    else:
+        await cache.aset(_cache_key(question_id), result,
+                         settings.RESULTS_CACHE_TTL)
+
+
+def invalidate_results(question_ids) -> None:
+    """
+    Drops the cached results of the given questions.
+    """
+    cache.delete_many([_cache_key(question_id)
+                       for question_id in question_ids])
+
+
+def cache_stats() -> dict:
+    """
+    Returns the hit and miss counters of the results cache
+    in this process.
+    """
+    with _cache_stats_lock:
+        return dict(_cache_stats)
@@ -0,0 +1,45 @@
+import contextlib
+import contextvars
+
+from django.conf import settings
+
+_replica_reads = contextvars.ContextVar('polls_replica_reads', default=False)
+
+
+@contextlib.contextmanager
+def use_replica():
+    """
+    Sends the reads of polls models made inside the block to the
+    POLLS_READ_REPLICA database, if one is configured.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_from_replica() -> bool:
+    return bool(settings.POLLS_READ_REPLICA) and _replica_reads.get()
+
+
+class ReplicaRouter:
+    """ Routes the reads of polls models to the read replica inside
+    use_replica() and everything else to the primary. Users and sessions
+    always stay on the primary, so a new login is seen at once.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'polls' and reading_from_replica():
+            return settings.POLLS_READ_REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is a copy of the primary, migrated with it
+        return db == 'default'
@@ -0,0 +1,151 @@
+import datetime
+import heapq
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from polls.archive import finalize_question
+from polls.models import Question
+from polls.questions import warm_question
+from polls.results import refresh_results
+
+logger = logging.getLogger(__name__)
+
+OPEN = 'open'
+CLOSE = 'close'
+
+# how far back each refresh looks again for edits committed late
+EDIT_OVERLAP = datetime.timedelta(seconds=5)
+
+# how long after a failed close hook it is run again
+CLOSE_RETRY = datetime.timedelta(seconds=60)
+
+# cache backends whose entries only the process writing them can see
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared() -> bool:
+    """
+    Returns True if the default cache is shared between processes, so
+    what the hooks warm or drop in it reaches the web workers.
+    """
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def on_poll_open(question_id: int) -> None:
+    """
+    Hook run when a poll is about to open: loads its detail and results
+    into the cache, so the first voters do not wait on the database.
+    """
+    warm_question(question_id)
+    refresh_results(question_id)
+
+
+def on_poll_close(question_id: int, now=None) -> None:
+    """
+    Hook run when a poll has closed: writes its final results, then
+    loads them into the cache in place of the live ones.
+    """
+    finalize_question(question_id, now)
+    refresh_results(question_id)
+
+
+class PollScheduler:
+    """ Runs the open and close hooks of each poll at its pub_date and
+    end_date, from a min-heap of the upcoming boundaries.
+
+    Edits are picked up through the indexed ``modified`` field, so each
+    refresh only reads the questions changed since the last one. Entries
+    made stale by an edit stay in the heap and are skipped when they come
+    up.
+    """
+
+    def __init__(self, open_lead: float = 0.0):
+        self.open_lead = datetime.timedelta(seconds=open_lead)
+        self._heap = []
+        # the pub_date and end_date of each question not finalized yet
+        self._dates = {}
+        self._since = None
+
+    def refresh(self, now=None) -> int:
+        """
+        Schedules the boundaries of the questions added or edited since
+        the last refresh (of all of them the first time).
+
+        Returns:
+            int: The number of boundaries scheduled.
+        """
+        now = now or timezone.now()
+        questions = Question.objects.filter(finalized_at__isnull=True)
+        if self._since is not None:
+            questions = questions.filter(modified__gte=self._since
+                                         - EDIT_OVERLAP)
+        scheduled = 0
+        for question_id, pub_date, end_date, modified in questions\
+                .values_list('pk', 'pub_date', 'end_date', 'modified')\
+                .iterator():
+            if self._since is None or modified > self._since:
+                self._since = modified
+            old_pub_date, old_end_date = self._dates.get(question_id,
+                                                         (None, None))
+            self._dates[question_id] = (pub_date, end_date)
+            if pub_date != old_pub_date and pub_date > now:
+                self._push(pub_date - self.open_lead, OPEN, question_id,
+                           pub_date)
+                scheduled += 1
+            if end_date != old_end_date and end_date is not None:
+                self._push(end_date, CLOSE, question_id, end_date)
+                scheduled += 1
+        return scheduled
+
+    def _push(self, when, kind: str, question_id: int, boundary) -> None:
+        heapq.heappush(self._heap, (when, kind, question_id, boundary))
+
+    def next_run(self):
+        """
+        Returns when the next hook is due, or None if none is scheduled.
+        """
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now=None) -> list:
+        """
+        Runs the hooks of every boundary reached at ``now``.
+
+        Returns:
+            list: (kind, question id) of each hook run.
+        """
+        now = now or timezone.now()
+        ran = []
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, question_id, boundary = heapq.heappop(self._heap)
+            dates = self._dates.get(question_id)
+            if dates is None or dates[0 if kind == OPEN else 1] != boundary:
+                continue    # the question changed or is gone
+            # an end_date is still open, the poll closes just after it
+            if kind == CLOSE and boundary >= now:
+                self._push(now + datetime.timedelta(milliseconds=1), kind,
+                           question_id, boundary)
+                break
+            try:
+                if kind == OPEN:
+                    on_poll_open(question_id)
+                else:
+                    on_poll_close(question_id, now)
+                    del self._dates[question_id]
+            except Question.DoesNotExist:
+                self._dates.pop(question_id, None)
+                continue
+            except Exception:
+                logger.exception("The %s hook of question %s failed.",
+                                 kind, question_id)
+                if kind == CLOSE:
+                    self._push(now + CLOSE_RETRY, kind, question_id,
+                               boundary)
+                continue
+            logger.info("Ran the %s hook of question %s.", kind, question_id)
+            ran.append((kind, question_id))
+        return ran
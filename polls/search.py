@@ -0,0 +1,139 @@
+import re
+
+from django.db import connections, router
+from django.utils import timezone
+
+from polls.models import Question
+
+# the FTS5 table holding one document per question: its text and the
+# text of its choices, with the question id as rowid
+SEARCH_TABLE = 'polls_question_search'
+
+# bm25() weights of the question_text and choice_text columns
+QUESTION_WEIGHT = 4.0
+CHOICE_WEIGHT = 1.0
+
+# the most question ids put in one statement when indexing
+INDEX_CHUNK_SIZE = 500
+
+_DOCUMENTS_SQL = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, question_text, choice_text)
+    SELECT q.id, q.question_text,
+           COALESCE((SELECT group_concat(c.choice_text, ' ')
+                     FROM polls_choice c WHERE c.question_id = q.id), '')
+    FROM polls_question q
+"""
+
+
+class SearchUnavailable(Exception):
+    """ Raised when the database has no full-text index (not SQLite). """
+
+
+def search_enabled(using: str = 'default') -> bool:
+    """
+    Returns True if the database has the FTS5 search table, which is
+    only created on SQLite.
+    """
+    return connections[using].vendor == 'sqlite'
+
+
+def search_terms(query: str) -> str:
+    """
+    Returns an FTS5 query matching the documents that contain every
+    word of ``query``, the last one as a prefix, so "fav col" finds
+    "favourite colour". Operators typed by users are ignored rather than
+    failing the query. Returns "" if ``query`` has no words.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def index_questions(question_ids, using: str = 'default') -> None:
+    """
+    Writes the search documents of the given questions again, dropping
+    those of questions that no longer exist.
+    """
+    if not search_enabled(using):
+        return
+    question_ids = sorted(set(question_ids))
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(question_ids), INDEX_CHUNK_SIZE):
+            chunk = question_ids[start:start + INDEX_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} "
+                           f"WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(
+                f"{_DOCUMENTS_SQL} WHERE q.id IN ({placeholders})", chunk)
+
+
+def rebuild_search_index(using: str = 'default') -> int:
+    """
+    Rebuilds the whole search table from the questions and choices.
+
+    Returns:
+        int: The number of questions indexed.
+    """
+    if not search_enabled(using):
+        raise SearchUnavailable("Full-text search needs SQLite FTS5.")
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(_DOCUMENTS_SQL)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_changed(sender, instance, **kwargs) -> None:
+    """
+    Receiver of post_save and post_delete of Question and Choice that
+    keeps the search document of the question in step.
+    """
+    if sender is Question:
+        question_id = instance.pk
+    else:
+        question_id = instance.question_id
+    index_questions([question_id], using=kwargs.get('using', 'default'))
+
+
+def search_questions(query: str, page: int = 1, page_size: int = 10,
+                     now=None):
+    """
+    Returns one page of the published questions matching ``query``,
+    best match first (by bm25, the question text weighing more than the
+    choices), each annotated with ``is_open``.
+
+    Returns:
+        tuple: The questions on the page and whether there is a next page.
+
+    Raises:
+        SearchUnavailable: If the database has no search table.
+    """
+    now = now or timezone.now()
+    using = router.db_for_read(Question)
+    if not search_enabled(using):
+        raise SearchUnavailable("Full-text search needs SQLite FTS5.")
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT q.id FROM {SEARCH_TABLE} "
+            f"JOIN polls_question q ON q.id = {SEARCH_TABLE}.rowid "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND q.pub_date <= %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, %s, %s), q.pub_date DESC "
+            f"LIMIT %s OFFSET %s",
+            [terms, connection.ops.adapt_datetimefield_value(now),
+             QUESTION_WEIGHT, CHOICE_WEIGHT, page_size + 1,
+             (page - 1) * page_size])
+        question_ids = [row[0] for row in cursor.fetchall()]
+
+    has_next = len(question_ids) > page_size
+    question_ids = question_ids[:page_size]
+    questions = Question.objects.using(using).with_status(now)\
+        .in_bulk(question_ids)
+    return [questions[pk] for pk in question_ids if pk in questions], has_next
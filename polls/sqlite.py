@@ -0,0 +1,55 @@
+import functools
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# the PRAGMAs SQLITE_PRAGMAS may set
+SQLITE_PRAGMA_NAMES = {'journal_mode', 'synchronous', 'mmap_size',
+                       'cache_size', 'busy_timeout', 'temp_store'}
+
+
+def configure_sqlite(sender, connection, **kwargs) -> None:
+    """
+    Applies the SQLITE_PRAGMAS to each new SQLite connection.
+    Receiver of the connection_created signal.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        if name not in SQLITE_PRAGMA_NAMES \
+                or not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f"Invalid SQLite PRAGMA {name} = {value}.")
+        # on the DB-API connection, so the PRAGMAs are not counted as
+        # queries of the request that opened the connection
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def retry_if_locked(func):
+    """
+    Retries the decorated write when SQLite reports "database is locked",
+    up to SQLITE_LOCK_RETRIES times with exponential backoff and jitter,
+    starting from SQLITE_LOCK_RETRY_DELAY seconds. A call made inside an
+    outer transaction is not retried, as that transaction is lost anyway.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.SQLITE_LOCK_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if 'database is locked' not in str(exc) \
+                        or attempt == retries \
+                        or connections['default'].in_atomic_block:
+                    raise
+                delay = settings.SQLITE_LOCK_RETRY_DELAY * 2 ** attempt
+                logger.warning("Database is locked, retrying %s in %.3fs.",
+                               func.__name__, delay)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+    return wrapper
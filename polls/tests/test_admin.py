@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Question, Choice, Vote
+from polls.voting import cast_vote
+
+
+class PollsAdminTests(TestCase):
+    """ Tests of the polls admin pages. """
+
+    def setUp(self):
+        cache.clear()
+        self.question = Question.objects.create(question_text="Question",
+                                                pub_date=timezone.now())
+        self.choices = [
+            Choice.objects.create(question=self.question,
+                                  choice_text=f"Choice {n}")
+            for n in range(2)
+        ]
+        self.voters = [User.objects.create_user(username=f"voter{n}")
+                       for n in range(5)]
+        for voter in self.voters:
+            cast_vote(voter, self.question, self.choices[0])
+        self.client.force_login(User.objects.create_superuser(
+            username="admin", password="admin"))
+
+    def changelist_queries(self, model: str) -> int:
+        url = reverse(f'admin:polls_{model}_changelist')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_vote_changelist_constant_queries(self) -> None:
+        """
+        The vote list runs as many queries whatever the number of votes.
+        """
+        self.changelist_queries('vote')
+        queries = self.changelist_queries('vote')
+        for n in range(5):
+            cast_vote(User.objects.create_user(username=f"more{n}"),
+                      self.question, self.choices[1])
+        self.assertEqual(self.changelist_queries('vote'), queries)
+
+    def test_choice_changelist_shows_votes(self) -> None:
+        """
+        The choice list shows the tally of each choice.
+        """
+        response = self.client.get(reverse('admin:polls_choice_changelist'))
+        self.assertContains(response, '<td class="field-vote_count">5</td>',
+                            html=True)
+
+    def test_changing_vote_updates_tallies(self) -> None:
+        """
+        Moving a vote to another choice in the admin moves its tally.
+        """
+        vote = Vote.objects.get(user=self.voters[0])
+        response = self.client.post(
+            reverse('admin:polls_vote_change', args=(vote.pk,)),
+            {'user': vote.user_id, 'question': self.question.pk,
+             'choice': self.choices[1].pk})
+        self.assertEqual(response.status_code, 302)
+        self.choices[0].refresh_from_db()
+        self.choices[1].refresh_from_db()
+        self.assertEqual((self.choices[0].votes, self.choices[1].votes),
+                         (4, 1))
+
+    def test_deleting_votes_updates_tallies(self) -> None:
+        """
+        Deleting votes in bulk in the admin lowers the tallies.
+        """
+        votes = Vote.objects.filter(user__in=self.voters[:2])
+        self.client.post(reverse('admin:polls_vote_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': [vote.pk for vote in votes]})
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.total_votes, 3)
+
+    def test_choice_of_other_question_refused(self) -> None:
+        """
+        A vote cannot be given a choice of another question.
+        """
+        other = Question.objects.create(question_text="Other",
+                                        pub_date=timezone.now())
+        response = self.client.post(reverse('admin:polls_vote_add'), {
+            'user': self.voters[0].pk, 'question': other.pk,
+            'choice': self.choices[1].pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Vote.objects.filter(question=other).exists())
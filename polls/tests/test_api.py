@@ -0,0 +1,207 @@
+import base64
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from polls.archive import archive_votes, finalize_question
+from polls.models import Question, Choice
+from polls.voting import cast_vote
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+@override_settings(POLLS_PAGE_SIZE=2)
+class QuestionListApiTests(TestCase):
+
+    def setUp(self):
+        self.closed = create_question(question_text="Closed", days=-3,
+                                      end_time=-1)
+        self.older = create_question(question_text="Older", days=-2)
+        self.newer = create_question(question_text="Newer", days=-1)
+        create_question(question_text="Future", days=1)
+
+    def test_pages_newest_first(self) -> None:
+        """
+        Published questions are listed newest first, one page at a time,
+        following next_cursor.
+        """
+        url = reverse('polls:api_questions')
+        first = self.client.get(url, {'fields': 'id'}).json()
+        self.assertEqual(first['results'],
+                         [{'id': self.newer.id}, {'id': self.older.id}])
+        second = self.client.get(url, {'fields': 'id',
+                                       'cursor': first['next_cursor']}).json()
+        self.assertEqual(second['results'], [{'id': self.closed.id}])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_filter_by_status(self) -> None:
+        """
+        ?status= lists only the open or the closed polls.
+        """
+        response = self.client.get(reverse('polls:api_questions'),
+                                   {'status': 'closed',
+                                    'fields': 'question_text,is_open'})
+        self.assertEqual(response.json()['results'],
+                         [{'question_text': "Closed", 'is_open': False}])
+
+    def test_default_fields(self) -> None:
+        """
+        Without ?fields= every question field is returned.
+        """
+        response = self.client.get(reverse('polls:api_questions'))
+        self.assertEqual(
+            list(response.json()['results'][0]),
+            ['id', 'question_text', 'pub_date', 'end_date', 'is_open',
+             'total_votes'])
+
+    def test_unknown_field_or_status(self) -> None:
+        """
+        An unknown field or status is answered with 400.
+        """
+        url = reverse('polls:api_questions')
+        self.assertEqual(self.client.get(url, {'fields': 'id,owner'})
+                         .status_code, 400)
+        self.assertEqual(self.client.get(url, {'status': 'soon'})
+                         .status_code, 400)
+
+    def test_bad_cursor(self) -> None:
+        """
+        A cursor that is not the next_cursor of a page is answered with
+        400, even one that decodes to an id too large for the database.
+        """
+        url = reverse('polls:api_questions')
+        forged = base64.urlsafe_b64encode(
+            b"2023-01-01T00:00:00+00:00|99999999999999999999").decode()
+        for cursor in ('not-a-cursor', forged):
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('cursor', response.json()['error'])
+
+    def test_one_query(self) -> None:
+        """
+        A page of questions is one query.
+        """
+        with self.assertNumQueries(1):
+            self.client.get(reverse('polls:api_questions'))
+
+
+class QuestionDetailApiTests(TestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text="Pick one", days=-1)
+        self.first = Choice.objects.create(question=self.question,
+                                           choice_text="First")
+        self.second = Choice.objects.create(question=self.question,
+                                            choice_text="Second")
+        cast_vote(User.objects.create_user(username="voter"), self.question,
+                  self.second)
+
+    def test_question_with_choices(self) -> None:
+        """
+        The question is returned with its choices and their votes.
+        """
+        response = self.client.get(
+            reverse('polls:api_question', args=(self.question.id,)),
+            {'fields': 'question_text,total_votes,choices'})
+        self.assertEqual(response.json(), {
+            'question_text': "Pick one",
+            'total_votes': 1,
+            'choices': [
+                {'id': self.first.id, 'choice_text': "First", 'votes': 0},
+                {'id': self.second.id, 'choice_text': "Second", 'votes': 1},
+            ],
+        })
+
+    def test_without_choices(self) -> None:
+        """
+        Leaving choices out of ?fields= skips their query.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('polls:api_question', args=(self.question.id,)),
+                {'fields': 'id'})
+        self.assertEqual(response.json(), {'id': self.question.id})
+
+    def test_unpublished_question(self) -> None:
+        """
+        A question not published yet is answered with 404.
+        """
+        future = create_question(question_text="Future", days=1)
+        response = self.client.get(reverse('polls:api_question',
+                                           args=(future.id,)))
+        self.assertEqual(response.status_code, 404)
+
+
+class MyVoteApiTests(TestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text="Pick one", days=-2,
+                                        end_time=1)
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="First")
+        self.user = User.objects.create_user(username="voter")
+        self.url = reverse('polls:api_vote', args=(self.question.id,))
+
+    def test_requires_login(self) -> None:
+        """
+        Anonymous users are answered with 401, not a login redirect.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_no_vote(self) -> None:
+        """
+        A user who has not voted gets a null vote.
+        """
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).json(), {'vote': None})
+
+    def test_current_vote(self) -> None:
+        """
+        The user's vote is returned with the chosen fields.
+        """
+        cast_vote(self.user, self.question, self.choice)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'fields': 'choice,choice_text'})
+        self.assertEqual(response.json(), {
+            'vote': {'choice': self.choice.id, 'choice_text': "First"}})
+
+    def test_archived_vote(self) -> None:
+        """
+        The vote is still found once it was archived.
+        """
+        cast_vote(self.user, self.question, self.choice)
+        Question.objects.filter(pk=self.question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(days=1))
+        finalize_question(self.question.id)
+        archive_votes(self.question.id)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['vote']['choice'], self.choice.id)
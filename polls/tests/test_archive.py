@@ -0,0 +1,133 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from polls.archive import archive_votes, finalize_closed_polls
+from polls.export import vote_rows
+from polls.models import Question, Choice, Vote, ArchivedVote, ResultSnapshot
+from polls.results import question_results
+from polls.tests.utils import QueryBudgetMixin
+from polls.voting import cast_vote, rebuild_tallies
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class ArchiveTests(QueryBudgetMixin, TestCase):
+    """ Tests of finalizing closed polls and archiving their votes. """
+
+    def setUp(self):
+        cache.clear()
+        self.closed = create_question(question_text="Closed", days=-3,
+                                      end_time=1)
+        self.open = create_question(question_text="Open", days=-3,
+                                    end_time=1)
+        self.choices = [
+            Choice.objects.create(question=self.closed,
+                                  choice_text=f"Choice {n}")
+            for n in range(2)
+        ]
+        self.voters = [User.objects.create_user(username=f"voter{n}",
+                                                password="voter")
+                       for n in range(3)]
+        for n, voter in enumerate(self.voters):
+            cast_vote(voter, self.closed, self.choices[n % 2])
+        Question.objects.filter(pk=self.closed.pk).update(
+            end_date=timezone.now() - datetime.timedelta(days=1))
+
+    def test_finalize_closed_only(self) -> None:
+        """
+        Only the closed poll gets a snapshot of its final votes.
+        """
+        report = finalize_closed_polls()
+        self.assertEqual(report['finalized'], [self.closed.pk])
+        self.assertEqual(
+            list(ResultSnapshot.objects.order_by('choice_id')
+                 .values_list('choice_id', 'votes')),
+            [(self.choices[0].pk, 2), (self.choices[1].pk, 1)])
+        self.assertEqual(finalize_closed_polls()['finalized'], [])
+
+    def test_results_served_from_snapshot(self) -> None:
+        """
+        The results of a finalized poll come from its snapshot.
+        """
+        finalize_closed_polls()
+        Choice.objects.filter(pk=self.choices[0].pk).update(vote_count=99)
+        result = question_results([self.closed.pk])[self.closed.pk]
+        self.assertIsNotNone(result['finalized_at'])
+        self.assertEqual([choice['votes'] for choice in result['choices']],
+                         [2, 1])
+        response = self.client.get(reverse('polls:results',
+                                           args=(self.closed.pk,)))
+        self.assertContains(response, "Final results")
+
+    def test_archive_moves_votes(self) -> None:
+        """
+        Archiving empties the Vote table of the poll, keeps the results
+        and survives a recount of the tallies.
+        """
+        report = finalize_closed_polls(archive=True)
+        self.assertEqual(report['archived_votes'], 3)
+        self.assertFalse(Vote.objects.filter(question=self.closed).exists())
+        self.assertEqual(ArchivedVote.objects.count(), 3)
+        rebuild_tallies()
+        result = question_results([self.closed.pk])[self.closed.pk]
+        self.assertEqual(result['total_votes'], 3)
+        self.assertEqual(len(vote_rows([self.closed.pk])), 3)
+
+    def test_archived_vote_shown(self) -> None:
+        """
+        A voter still sees their vote on an archived poll.
+        """
+        finalize_closed_polls(archive=True)
+        self.client.login(username="voter0", password="voter")
+        # the archive is looked up in the same query as the live votes
+        with self.assertWithinQueryBudget('polls:detail'):
+            response = self.client.get(reverse('polls:detail',
+                                               args=(self.closed.pk,)))
+        self.assertContains(response, "You already voted choice Choice 0")
+
+    def test_archive_needs_finalized(self) -> None:
+        """
+        The votes of a poll that is not final are not archived.
+        """
+        with self.assertRaises(ValueError):
+            archive_votes(self.open.pk)
+
+    def test_command(self) -> None:
+        """
+        finalize_polls --archive finalizes and archives in one go.
+        """
+        out = StringIO()
+        call_command('finalize_polls', '--archive', stdout=out)
+        self.assertIn("Finalized 1 polls, archived 3 votes.", out.getvalue())
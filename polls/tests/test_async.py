@@ -0,0 +1,78 @@
+"""Runs the view tests again against the async views in polls.async_views.
+
+Each test case here overrides ROOT_URLCONF with the URL patterns of this
+module, which serve the detail, results and vote pages asynchronously.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from polls import views
+from polls.models import Choice
+from polls.tests import test_auth, test_detail, test_results, test_voting
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("polls/", include("polls.urls_async")),
+    path('accounts/', include('django.contrib.auth.urls')),
+    path('signup/', views.signup, name='signup'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncUserAuthTest(test_auth.UserAuthTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncQuestionDetailViewTests(test_detail.QuestionDetailViewTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncQuestionResultsTests(test_results.QuestionResultsTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncQuestionVotingTests(test_voting.QuestionVotingTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncClientTests(TestCase):
+    """The async views also work when served from an event loop."""
+
+    def setUp(self):
+        self.question = test_voting.create_question(question_text='Question')
+        self.choice = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice1'
+        )
+        self.user = User.objects.create_user(username='test', password='test')
+
+    async def test_vote_and_results(self) -> None:
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(
+            reverse('polls:detail', args=(self.question.id,)))
+        self.assertContains(response, 'Choice1')
+
+        response = await self.async_client.post(
+            reverse('polls:vote', args=(self.question.id,)),
+            {'choice': self.choice.id})
+        self.assertEqual(response.status_code, 302)
+
+        response = await self.async_client.get(
+            reverse('polls:results', args=(self.question.id,)))
+        self.assertEqual(response.context['total_votes'], 1)
+
+    async def test_results_stream(self) -> None:
+        response = await self.async_client.get(
+            reverse('polls:results_stream', args=(self.question.id,)))
+        events = response.streaming_content
+        self.assertTrue((await events.__anext__()).startswith(b'retry: '))
+        self.assertIn(f'"{self.choice.id}": 0'.encode(),
+                      await events.__anext__())
+        await events.aclose()
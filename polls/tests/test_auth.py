@@ -1,10 +1,14 @@
 import datetime
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.urls import reverse
 from polls.models import Question, Choice
 from django.contrib.auth.models import User
+from polls.backends import user_cache_key
 
 
 def create_question(question_text="",
@@ -103,3 +107,48 @@ class UserAuthTest(TestCase):
         url_login = reverse('login')
         login_with_next = f"{url_login}?next={vote_url}"
         self.assertRedirects(response, login_with_next)
+
+
+class CachedUserTest(TestCase):
+    """ Tests of caching the logged-in user between requests. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser",
+                                             password="FatChance!")
+        self.question = create_question(question_text="Question")
+        self.client.force_login(self.user)
+        self.url = reverse('polls:detail', args=(self.question.id,))
+
+    def user_queries(self) -> int:
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        return sum('"auth_user"' in query['sql']
+                   for query in context.captured_queries)
+
+    def test_user_read_once(self):
+        """
+        The user is read from the database once, then from the cache.
+        """
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(self.user_queries(), 0)
+
+    def test_password_change_invalidates(self):
+        """
+        Changing the password drops the cached user, which logs out the
+        sessions made with the old password.
+        """
+        self.user_queries()
+        self.user.set_password("Another1!")
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_invalidates(self):
+        """
+        Logging out drops the cached user.
+        """
+        self.user_queries()
+        self.client.post(reverse('logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
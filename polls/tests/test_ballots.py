@@ -0,0 +1,257 @@
+import base64
+import datetime
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.utils import timezone
+from django.urls import reverse
+from polls.ballots import submit_ballots
+from polls.models import Question, Choice, Vote
+from polls.ratelimit import reset_rate_limits
+from polls.voting import cast_vote
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class SubmitBallotsTests(TestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text="Open", days=-2,
+                                        end_time=2)
+        self.first = Choice.objects.create(question=self.question,
+                                           choice_text="First")
+        self.second = Choice.objects.create(question=self.question,
+                                            choice_text="Second")
+        self.user = User.objects.create_user(username="voter")
+
+    def ballot(self, choice, user=None, **offset) -> dict:
+        when = timezone.now() - datetime.timedelta(**offset or {'hours': 1})
+        return {'user': (user or self.user).id, 'question': self.question.id,
+                'choice': choice.id, 'timestamp': when.isoformat()}
+
+    def test_valid_ballots_are_recorded(self) -> None:
+        """
+        Valid ballots of several users are recorded and counted.
+        """
+        other = User.objects.create_user(username="other")
+        report = submit_ballots([self.ballot(self.first),
+                                 self.ballot(self.second, user=other)])
+        self.assertEqual(report['accepted'], 2)
+        self.assertEqual(Vote.objects.filter(question=self.question).count(),
+                         2)
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.total_votes, 2)
+
+    def test_latest_ballot_wins(self) -> None:
+        """
+        Of two ballots of a user on a question, the one with the later
+        timestamp is recorded, whatever their order in the batch.
+        """
+        report = submit_ballots([self.ballot(self.second, minutes=5),
+                                 self.ballot(self.first, minutes=30)])
+        self.assertEqual([result['status'] for result in report['results']],
+                         ['accepted', 'superseded'])
+        self.assertEqual(Vote.objects.get(user=self.user).choice,
+                         self.second)
+
+    def test_newer_vote_is_kept(self) -> None:
+        """
+        A ballot cast before the user's vote on the web does not replace
+        it, a ballot cast after it does.
+        """
+        cast_vote(self.user, self.question, self.second)
+        report = submit_ballots([self.ballot(self.first, minutes=30)])
+        self.assertEqual(report['results'][0]['status'], 'superseded')
+        self.assertEqual(Vote.objects.get(user=self.user).choice,
+                         self.second)
+
+        later = self.ballot(self.first, minutes=-1)
+        report = submit_ballots([later], now=timezone.now()
+                                + datetime.timedelta(minutes=2))
+        self.assertEqual(report['accepted'], 1)
+        self.assertEqual(Vote.objects.get(user=self.user).choice,
+                         self.first)
+        self.assertEqual(Choice.objects.get(id=self.second.id).votes, 0)
+
+    def test_ballot_checked_at_its_timestamp(self) -> None:
+        """
+        A ballot dated before the poll was published is rejected, even if
+        the poll is open now.
+        """
+        report = submit_ballots([self.ballot(self.first, days=3)])
+        self.assertEqual(report['results'][0]['status'], 'rejected')
+        self.assertFalse(Vote.objects.exists())
+
+    def test_ballot_of_closed_poll_dated_while_open(self) -> None:
+        """
+        A ballot cast while the poll was open is accepted after it closed.
+        """
+        Question.objects.filter(pk=self.question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(hours=1))
+        report = submit_ballots([self.ballot(self.first, hours=2)])
+        self.assertEqual(report['accepted'], 1)
+
+    def test_invalid_ballots_are_rejected(self) -> None:
+        """
+        Malformed ballots and ballots with a choice of another question
+        are rejected without stopping the others.
+        """
+        other = create_question(question_text="Other", days=-1)
+        foreign = Choice.objects.create(question=other, choice_text="No")
+        report = submit_ballots([
+            {'user': self.user.id},
+            self.ballot(foreign),
+            {**self.ballot(self.first), 'timestamp': "yesterday"},
+            self.ballot(self.first),
+        ])
+        self.assertEqual([result['status'] for result in report['results']],
+                         ['rejected', 'rejected', 'rejected', 'accepted'])
+
+    def test_bad_ids_are_rejected(self) -> None:
+        """
+        Ids that are not whole numbers, or too large for the database,
+        reject their ballot only.
+        """
+        bad_ids = [{'user': 99999999999999999999},
+                   {'question': str(2 ** 63)},
+                   {'choice': 0},
+                   {'choice': self.first.id + 0.5},
+                   {'user': True},
+                   {'question': [self.question.id]}]
+        report = submit_ballots(
+            [{**self.ballot(self.first), **bad} for bad in bad_ids]
+            + [self.ballot(self.second)])
+        self.assertEqual([result['status'] for result in report['results']],
+                         ['rejected'] * len(bad_ids) + ['accepted'])
+        self.assertEqual(report['results'][0]['error'],
+                         "user, question and choice must be ids.")
+
+    def test_query_count_does_not_grow(self) -> None:
+        """
+        Validating and recording a batch takes the same queries for one
+        ballot as for many.
+        """
+        users = [User.objects.create_user(username=f"kiosk{number}")
+                 for number in range(20)]
+        with self.assertNumQueries(13):
+            submit_ballots([self.ballot(self.first, user=users[0])])
+        Vote.objects.all().delete()
+        with self.assertNumQueries(13):
+            submit_ballots([self.ballot(self.first, user=user)
+                            for user in users[1:]])
+
+
+class BallotsViewTests(TestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text="Open", days=-2,
+                                        end_time=2)
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="First")
+        self.voter = User.objects.create_user(username="voter",
+                                              password="voter")
+        self.staff = User.objects.create_user(username="staff",
+                                              password="staff",
+                                              is_staff=True)
+        self.url = reverse('polls:api_ballots')
+        self.body = json.dumps({'ballots': [
+            {'user': self.voter.id, 'question': self.question.id,
+             'choice': self.choice.id},
+        ]})
+        # kiosks hold no session and no CSRF token
+        self.client = Client(enforce_csrf_checks=True)
+        reset_rate_limits()
+
+    def post(self, body, username="staff", password="staff"):
+        credentials = base64.b64encode(f"{username}:{password}".encode())
+        return self.client.post(
+            self.url, body, content_type='application/json',
+            HTTP_AUTHORIZATION=f"Basic {credentials.decode()}")
+
+    def test_requires_staff(self) -> None:
+        """
+        Only the credentials of a staff member are accepted.
+        """
+        response = self.client.post(self.url, self.body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Basic', response['WWW-Authenticate'])
+        self.assertEqual(self.post(self.body, password="wrong").status_code,
+                         401)
+        self.assertEqual(self.post(self.body, "voter", "voter").status_code,
+                         403)
+
+    def test_session_is_not_enough(self) -> None:
+        """
+        A staff session without credentials does not submit ballots, so
+        a forged cross-site request cannot either.
+        """
+        self.client.force_login(self.staff)
+        response = self.client.post(self.url, self.body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_submit(self) -> None:
+        """
+        Staff get the status of each ballot, without a CSRF token.
+        """
+        response = self.post(self.body)
+        self.assertEqual(response.json()['results'], [{'status': 'accepted'}])
+        self.assertTrue(Vote.objects.filter(user=self.voter).exists())
+
+    def test_invalid_body(self) -> None:
+        """
+        A body that is not a JSON batch of ballots is refused.
+        """
+        self.assertEqual(self.post("[1, 2]").status_code, 400)
+        self.assertEqual(self.post('{"ballots": 1}').status_code, 400)
+        credentials = base64.b64encode(b"staff:staff").decode()
+        response = self.client.post(
+            self.url, {'ballots': '[]'},
+            HTTP_AUTHORIZATION=f"Basic {credentials}")
+        self.assertEqual(response.status_code, 415)
+
+    def test_replay_command(self) -> None:
+        """
+        The replay_ballots command records the ballots of a CSV file.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as ballots:
+            ballots.write("user,question,choice,timestamp\n"
+                          f"{self.voter.id},{self.question.id},"
+                          f"{self.choice.id},\n")
+            ballots.flush()
+            output = StringIO()
+            call_command('replay_ballots', ballots.name, stdout=output)
+        self.assertIn("Accepted 1 ballots", output.getvalue())
+        self.assertTrue(Vote.objects.filter(user=self.voter).exists())
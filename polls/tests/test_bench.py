@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from polls.bench import compare, percentile, run_benchmarks
+from polls.models import Question, Vote
+
+
+def scenario(p50: float, throughput: float, queries: int) -> dict:
+    return {'throughput': throughput,
+            'latency_ms': {'p50': p50, 'p90': p50 * 2},
+            'queries': {'p50': queries, 'max': queries}}
+
+
+class BenchmarkTests(TestCase):
+
+    def test_percentile(self) -> None:
+        """
+        Percentiles are taken by nearest rank.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1.0), 100)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_compare_within_threshold(self) -> None:
+        """
+        Changes smaller than the threshold are not regressions.
+        """
+        baseline = {'scenarios': {'index': scenario(10.0, 100.0, 3)}}
+        report = {'scenarios': {'index': scenario(10.5, 96.0, 3)}}
+        self.assertEqual(compare(report, baseline, 0.1), [])
+
+    def test_compare_regressions(self) -> None:
+        """
+        Slower latencies, lower throughput and more queries are each
+        reported; scenarios missing from the baseline are skipped.
+        """
+        baseline = {'scenarios': {'index': scenario(10.0, 100.0, 3)}}
+        report = {'scenarios': {'index': scenario(20.0, 50.0, 4),
+                                'vote': scenario(5.0, 10.0, 9)}}
+        regressions = compare(report, baseline, 0.1)
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(all(line.startswith("index:")
+                            for line in regressions))
+
+    def test_run_benchmarks(self) -> None:
+        """
+        A small run builds the dataset and measures every scenario.
+        """
+        report = run_benchmarks(questions=10, choices=2, votes=3,
+                                requests=2, warmup=1)
+        self.assertEqual(Question.objects.count(), 10)
+        self.assertGreaterEqual(Vote.objects.count(), 30)
+        self.assertEqual(list(report['scenarios']),
+                         ['index', 'detail', 'results', 'vote', 'signup'])
+        for name, measures in report['scenarios'].items():
+            self.assertEqual(measures['requests'], 2, name)
+            self.assertEqual(measures['errors'], 0, name)
+            self.assertGreater(measures['queries']['max'], 0, name)
@@ -0,0 +1,86 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from polls.models import Question, Choice
+from polls.tests.utils import QueryBudgetMixin
+from polls.voting import cast_vote
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """ The polls views stay within their query budgets however many
+    questions, choices and votes there are.
+    """
+
+    def setUp(self):
+        cache.clear()
+        for n in range(10):
+            create_question(question_text=f"Question {n}", days=-n - 1)
+        self.question = create_question(question_text="Question", end_time=1)
+        self.choices = [
+            Choice.objects.create(question=self.question,
+                                  choice_text=f"Choice {n}")
+            for n in range(10)
+        ]
+        for n in range(10):
+            voter = User.objects.create_user(username=f"voter{n}")
+            cast_vote(voter, self.question, self.choices[n])
+        self.user = User.objects.create_user(username="test",
+                                             password="test")
+        self.client.force_login(self.user)
+
+    def test_index_budget(self) -> None:
+        with self.assertWithinQueryBudget('polls:index'):
+            response = self.client.get(reverse('polls:index'))
+        self.assertIn('Server-Timing', response)
+
+    def test_detail_budget(self) -> None:
+        url = reverse('polls:detail', args=(self.question.id,))
+        with self.assertWithinQueryBudget('polls:detail'):
+            response = self.client.get(url)
+        self.assertIn('Server-Timing', response)
+
+    def test_results_budget(self) -> None:
+        url = reverse('polls:results', args=(self.question.id,))
+        with self.assertWithinQueryBudget('polls:results'):
+            response = self.client.get(url)
+        self.assertIn('Server-Timing', response)
+
+    def test_vote_budget(self) -> None:
+        url = reverse('polls:vote', args=(self.question.id,))
+        with self.assertWithinQueryBudget('polls:vote'):
+            self.client.post(url, {'choice': self.choices[0].id})
+        with self.assertWithinQueryBudget('polls:vote'):
+            response = self.client.post(url, {'choice': self.choices[1].id})
+        self.assertIn('Server-Timing', response)
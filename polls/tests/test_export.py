@@ -0,0 +1,102 @@
+import datetime
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from polls.models import Question, Choice
+from polls.voting import cast_vote
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.old_question = create_question(question_text="Old", days=-30)
+        self.question = create_question(question_text="New", days=-1)
+        self.voter = User.objects.create_user(username="voter")
+        for question in (self.old_question, self.question):
+            choice = Choice.objects.create(question=question,
+                                           choice_text=f"{question} choice")
+            cast_vote(self.voter, question, choice)
+        self.staff = User.objects.create_user(username="staff",
+                                              password="staff",
+                                              is_staff=True)
+
+    def test_export_requires_staff(self) -> None:
+        """
+        Only staff can download the exports.
+        """
+        self.client.force_login(self.voter)
+        response = self.client.get(reverse('polls:export_votes'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_votes_csv(self) -> None:
+        """
+        The votes are streamed as CSV with a header row.
+        """
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('polls:export_votes'),
+                                   {'question': self.question.id})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines,
+            ['user_id,username,question_id,choice_id,choice_text',
+             f'{self.voter.id},voter,{self.question.id},'
+             f'{self.question.choice_set.get().id},New choice'],
+        )
+
+    def test_export_results_ndjson_by_date(self) -> None:
+        """
+        The results of questions published in a date range are streamed
+        as NDJSON.
+        """
+        self.client.force_login(self.staff)
+        since = (timezone.now() - datetime.timedelta(days=7)).date()
+        response = self.client.get(reverse('polls:export_results'),
+                                   {'format': 'ndjson',
+                                    'since': since.isoformat()})
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['question_text'], "New")
+        self.assertEqual(rows[0]['votes'], 1)
+
+    def test_export_command(self) -> None:
+        """
+        The export_polls command writes the same export.
+        """
+        output = StringIO()
+        call_command('export_polls', 'votes', '--format', 'ndjson',
+                     stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from polls.importer import iter_json_objects
+from polls.models import Question, Choice, Vote
+from polls.results import cached_results
+from polls.voting import rebuild_tallies
+
+
+def catalog(question_text="Question", choice_text="Choice"):
+    """
+    Returns a small catalog in the fixture format: one question, two
+    choices and a vote of user 1 for each choice, the second one last.
+    """
+    return [
+        {"model": "polls.question", "pk": 1,
+         "fields": {"question_text": question_text,
+                    "pub_date": "2023-09-01T15:00:20Z", "end_date": None}},
+        {"model": "polls.choice", "pk": 1,
+         "fields": {"question": 1, "choice_text": f"{choice_text} 1"}},
+        {"model": "polls.choice", "pk": 2,
+         "fields": {"question": 1, "choice_text": f"{choice_text} 2"}},
+        {"model": "polls.vote", "pk": 1, "fields": {"user": 1, "choice": 1}},
+        {"model": "polls.vote", "pk": 2, "fields": {"user": 1, "choice": 2}},
+    ]
+
+
+class ImportPollsTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(id=1, username="test")
+
+    def import_file(self, content: str, suffix: str = ".json", **options):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as stream:
+            stream.write(content)
+        try:
+            call_command("import_polls", path, stdout=StringIO(), **options)
+        finally:
+            os.remove(path)
+
+    def test_stream_parser_across_reads(self) -> None:
+        """
+        Objects are parsed correctly when they span several reads.
+        """
+        objects = catalog()
+        stream = io.StringIO(json.dumps(objects, indent=2))
+        self.assertEqual(list(iter_json_objects(stream, read_size=7)),
+                         objects)
+
+    def test_import_json(self) -> None:
+        """
+        A JSON catalog is imported with the last vote of each user on a
+        question and recounted tallies.
+        """
+        self.import_file(json.dumps(catalog()), chunk_size=2)
+        self.assertEqual(Question.objects.get(pk=1).total_votes, 1)
+        self.assertEqual(Vote.objects.get().choice_id, 2)
+        self.assertEqual(Choice.objects.get(pk=2).votes, 1)
+
+    def test_reimport_updates_by_pk(self) -> None:
+        """
+        Importing a newer catalog updates the objects with the same pk
+        instead of duplicating them.
+        """
+        self.import_file(json.dumps(catalog()))
+        self.import_file(json.dumps(catalog("New question", "New choice")))
+        self.assertEqual(Question.objects.get().question_text, "New question")
+        self.assertEqual(Choice.objects.get(pk=1).choice_text, "New choice 1")
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_import_csv(self) -> None:
+        """
+        The CSV variant of the catalog is imported the same way.
+        """
+        self.import_file(
+            "model,pk,question_text,pub_date,end_date,question,choice_text,"
+            "user,choice\n"
+            "polls.question,1,Question,2023-09-01T15:00:20Z,,,,,\n"
+            "polls.choice,1,,,,1,Choice 1,,\n"
+            "polls.vote,,,,,,,1,1\n",
+            suffix=".csv",
+        )
+        self.assertEqual(Choice.objects.get(pk=1).votes, 1)
+
+    def test_invalid_object(self) -> None:
+        """
+        An invalid object stops the import with its position.
+        """
+        objects = catalog()
+        objects[0]["fields"]["pub_date"] = "yesterday"
+        with self.assertRaisesMessage(CommandError, "Object 1"):
+            self.import_file(json.dumps(objects))
+
+    def test_invalid_halfway(self) -> None:
+        """
+        When the import stops halfway, the tallies and cached results of
+        what was written before agree with its votes.
+        """
+        cache.clear()
+        Question.objects.create(pk=1, question_text="Old",
+                                pub_date="2023-09-01T15:00:20Z")
+        self.assertEqual(cached_results([1])[1]['total_votes'], 0)
+        objects = catalog() + [{"model": "polls.vote",
+                                "fields": {"user": 2, "choice": 1}}]
+        with self.assertRaisesMessage(CommandError,
+                                      "Object 6: User 2 does not exist."):
+            self.import_file(json.dumps(objects), chunk_size=1)
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(rebuild_tallies(fix=False), [])
+        self.assertEqual(cached_results([1])[1]['total_votes'], 1)
+
+
+class ImportIntegrityTests(TransactionTestCase):
+    """ Tests of objects the database refuses when the chunk commits. """
+
+    def setUp(self):
+        User.objects.create_user(id=1, username="test")
+
+    def test_missing_question(self) -> None:
+        """
+        A choice of a question that does not exist stops the import with
+        an error, after the chunks before it are counted.
+        """
+        objects = catalog() + [{"model": "polls.choice", "pk": 3,
+                                "fields": {"question": 2,
+                                           "choice_text": "Orphan"}}]
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as stream:
+            stream.write(json.dumps(objects))
+        self.addCleanup(os.remove, path)
+        with self.assertRaisesMessage(CommandError, "cannot be written"):
+            call_command("import_polls", path, chunk_size=5,
+                         stdout=StringIO())
+        self.assertFalse(Choice.objects.filter(pk=3).exists())
+        self.assertEqual(Question.objects.get(pk=1).total_votes, 1)
+        self.assertEqual(rebuild_tallies(fix=False), [])
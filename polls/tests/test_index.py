@@ -1,9 +1,14 @@
+import base64
 import datetime
 
-from django.test import TestCase
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.urls import reverse
-from polls.models import Question
+from polls.models import CatalogVersion, Question
 
 
 def create_question(question_text="",
@@ -89,3 +94,183 @@ class QuestionIndexViewTests(TestCase):
             response.context['latest_question_list'],
             [question2, question1],
         )
+
+    @override_settings(POLLS_PAGE_SIZE=2)
+    def test_keyset_pagination(self) -> None:
+        """
+        The index shows a page of questions at a time and links to
+        the next page with a cursor.
+        """
+        questions = [
+            create_question(question_text=f"Past question {n}.", days=-n)
+            for n in range(1, 6)
+        ]
+        response = self.client.get(reverse('polls:index'))
+        self.assertEqual(
+            list(response.context['latest_question_list']), questions[:2])
+
+        seen = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            response = self.client.get(reverse('polls:index'), params)
+            seen += response.context['latest_question_list']
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, questions)
+
+    def test_bad_cursor_shows_first_page(self) -> None:
+        """
+        A malformed cursor falls back to the first page.
+        """
+        question = create_question(question_text="Past question.", days=-1)
+        response = self.client.get(reverse('polls:index'),
+                                   {'cursor': 'not-a-cursor'})
+        self.assertEqual(
+            list(response.context['latest_question_list']), [question])
+
+    def test_forged_cursor_shows_first_page(self) -> None:
+        """
+        A cursor encode_cursor() cannot have made, with an id too large for
+        the database or a date without time zone, falls back to the first
+        page.
+        """
+        question = create_question(question_text="Past question.", days=-1)
+        for raw in ("2023-01-01T00:00:00+00:00|99999999999999999999",
+                    "2023-01-01T00:00:00+00:00|0",
+                    "2999-01-01T00:00:00|5",
+                    "0001-01-01T00:00:00+14:00|5"):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            response = self.client.get(reverse('polls:index'),
+                                       {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                list(response.context['latest_question_list']), [question])
+
+    def test_status_filter(self) -> None:
+        """
+        The index can show only the open or only the closed polls.
+        """
+        open_question = create_question(question_text="Open.", days=-1)
+        closed_question = create_question(question_text="Closed.", days=-2,
+                                          end_time=-1)
+        response = self.client.get(reverse('polls:index'), {'status': 'open'})
+        self.assertEqual(
+            list(response.context['latest_question_list']), [open_question])
+        response = self.client.get(reverse('polls:index'),
+                                   {'status': 'closed'})
+        self.assertEqual(
+            list(response.context['latest_question_list']), [closed_question])
+
+
+class ConditionalIndexTests(TestCase):
+    """ Tests of conditional GETs of the index page. """
+
+    def setUp(self):
+        cache.clear()
+        create_question(question_text="Question", days=-1)
+        self.url = reverse('polls:index')
+
+    def test_not_modified(self) -> None:
+        """
+        The index is not sent again, nor queried for, while nothing
+        changed.
+        """
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified_by_new_question(self) -> None:
+        """
+        Adding a question changes the ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        create_question(question_text="Another question", days=-1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Another question")
+
+    def test_modified_by_closing(self) -> None:
+        """
+        A poll closing changes the ETag.
+        """
+        question = create_question(question_text="Closing", days=-2,
+                                   end_time=1)
+        etag = self.client.get(self.url)['ETag']
+        Question.objects.filter(pk=question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(hours=1))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_by_publishing(self) -> None:
+        """
+        The ETag changes when a question gets published, with time only.
+        """
+        create_question(question_text="Soon", hours=1)
+        etag = self.client.get(self.url)['ETag']
+        later = timezone.now() + datetime.timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Soon")
+
+    def test_version_shared_by_processes(self) -> None:
+        """
+        The catalog version is read from the database, so an edit made in
+        another process, with its own cache, changes the ETag, and
+        emptying this process' cache does not.
+        """
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        CatalogVersion.objects.update(version=F('version') + 1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_page_differs(self) -> None:
+        """
+        Each filter of the index has its own ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'status': 'open'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class IndexFragmentCacheTests(TestCase):
+    """ Tests of caching the block of each question on the index. """
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question(question_text="Question", days=-2,
+                                        end_time=1)
+        self.url = reverse('polls:index')
+        self.client.get(self.url)
+
+    def test_block_cached(self) -> None:
+        """
+        An unchanged question is not rendered again.
+        """
+        Question.objects.filter(pk=self.question.pk).update(
+            question_text="Changed behind the cache")
+        self.assertContains(self.client.get(self.url), "Question")
+
+    def test_edited_question_rendered(self) -> None:
+        """
+        An edited question is rendered again.
+        """
+        self.question.question_text = "Edited"
+        self.question.save()
+        self.assertContains(self.client.get(self.url), "Edited")
+
+    def test_closed_question_rendered(self) -> None:
+        """
+        A question that closed is rendered again, without its vote button.
+        """
+        detail_url = 'href="{}"'.format(
+            reverse('polls:detail', args=(self.question.id,)))
+        self.assertContains(self.client.get(self.url), detail_url)
+        Question.objects.filter(pk=self.question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(hours=1))
+        self.assertNotContains(self.client.get(self.url), detail_url)
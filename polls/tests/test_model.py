@@ -110,3 +110,31 @@ class QuestionModelTests(TestCase):
             seconds=59
         )
         self.assertEqual(before_vote_question.can_vote(), False)
+
+    def test_with_status_matches_can_vote(self) -> None:
+        """
+        The is_open annotation agrees with can_vote() for open, closed
+        and future questions.
+        """
+        questions = [
+            create_question(end_time=1),
+            create_question(days=-2, end_time=-1),
+            create_question(days=-1),
+            create_question(days=1),
+        ]
+        now = timezone.now()
+        annotated = Question.objects.with_status(now).in_bulk()
+        for question in questions:
+            self.assertEqual(annotated[question.id].is_open,
+                             question.can_vote(now))
+
+    def test_open_and_closed_questions(self) -> None:
+        """
+        open() and closed() split the published questions by status
+        and leave out those that are not published yet.
+        """
+        open_question = create_question(end_time=1)
+        closed_question = create_question(days=-2, end_time=-1)
+        create_question(days=1)
+        self.assertQuerysetEqual(Question.objects.open(), [open_question])
+        self.assertQuerysetEqual(Question.objects.closed(), [closed_question])
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Question, Choice
+from polls.ratelimit import LocalBuckets, parse_rate, rate_limit_stats
+from polls.ratelimit import reset_rate_limits
+
+
+class TokenBucketTests(SimpleTestCase):
+    """ Tests of the token buckets. """
+
+    def test_parse_rate(self) -> None:
+        self.assertEqual(parse_rate("30/m"), (30, 0.5))
+        self.assertEqual(parse_rate("10/5"), (10, 2.0))
+        with self.assertRaises(ValueError):
+            parse_rate("often")
+
+    def test_burst_then_wait(self) -> None:
+        """
+        A bucket lets a burst through, then tells how long to wait.
+        """
+        buckets = LocalBuckets()
+        for _ in range(3):
+            self.assertEqual(buckets.take('key', "3/m"), 0)
+        self.assertAlmostEqual(buckets.take('key', "3/m"), 20, delta=1)
+        self.assertEqual(buckets.take('other key', "3/m"), 0)
+
+
+class RateLimitViewTests(TestCase):
+    """ Tests of rate limiting the vote and signup views. """
+
+    def setUp(self):
+        cache.clear()
+        reset_rate_limits()
+        self.addCleanup(reset_rate_limits)
+        self.question = Question.objects.create(question_text="Question",
+                                                pub_date=timezone.now())
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="Choice")
+
+    @override_settings(RATE_LIMITS={'vote': {'user': "2/m"}})
+    def test_vote_limited_per_user(self) -> None:
+        """
+        A user voting too often gets a 429 with Retry-After, without
+        the vote being counted; other users can still vote.
+        """
+        self.client.force_login(User.objects.create_user(username="fast"))
+        url = reverse('polls:vote', args=(self.question.id,))
+        for _ in range(2):
+            self.client.post(url, {'choice': self.choice.id})
+        with self.assertNumQueries(0), self.assertLogs('polls.ratelimit'):
+            response = self.client.post(url, {'choice': self.choice.id})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(rate_limit_stats(), {'vote:user': 1})
+
+        self.client.force_login(User.objects.create_user(username="slow"))
+        response = self.client.post(url, {'choice': self.choice.id})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMITS={'vote': {'user': "1/m"}})
+    def test_rejections_shown_to_staff(self) -> None:
+        """
+        Staff can read how many requests each rate limit rejected.
+        """
+        self.client.force_login(User.objects.create_user(username="staff",
+                                                         is_staff=True))
+        url = reverse('polls:vote', args=(self.question.id,))
+        with self.assertLogs('polls.ratelimit'):
+            for _ in range(3):
+                self.client.post(url, {'choice': self.choice.id})
+        response = self.client.get(reverse('polls:stats'))
+        self.assertEqual(response.json()['rate_limits'], {'vote:user': 2})
+
+    @override_settings(RATE_LIMITS={'signup': {'ip': "1/h"}})
+    def test_signup_limited_per_ip(self) -> None:
+        """
+        Signups from one IP are limited, but the form can still be shown.
+        """
+        data = {'username': "newuser", 'password1': "FatChance!1",
+                'password2': "FatChance!1"}
+        self.client.post(reverse('signup'), data)
+        with self.assertLogs('polls.ratelimit'):
+            response = self.client.post(reverse('signup'), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(reverse('signup')).status_code, 200)
+
+    @override_settings(RATE_LIMIT_BACKEND='cache',
+                       RATE_LIMITS={'signup': {'ip': "1/h"}})
+    def test_cache_backend(self) -> None:
+        """
+        The buckets can be kept in the cache instead.
+        """
+        self.client.post(reverse('signup'))
+        with self.assertLogs('polls.ratelimit'):
+            response = self.client.post(reverse('signup'))
+        self.assertEqual(response.status_code, 429)
@@ -0,0 +1,92 @@
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from polls.middleware import READ_YOUR_WRITES_COOKIE, ReplicaRoutingMiddleware
+from polls.models import Question, Choice
+from polls.routers import ReplicaRouter, reading_from_replica, use_replica
+
+
+@override_settings(POLLS_READ_REPLICA='replica')
+class ReplicaRouterTests(TestCase):
+    """ Tests of routing reads to the read replica. """
+
+    def test_polls_reads_in_use_replica(self) -> None:
+        """
+        Polls models are read from the replica inside use_replica() only.
+        """
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Question), 'default')
+        with use_replica():
+            self.assertEqual(router.db_for_read(Question), 'replica')
+            self.assertEqual(router.db_for_write(Question), 'default')
+        self.assertEqual(router.db_for_read(Question), 'default')
+
+    def test_users_stay_on_primary(self) -> None:
+        """
+        Users are always read from the primary.
+        """
+        with use_replica():
+            self.assertEqual(ReplicaRouter().db_for_read(User), 'default')
+
+    @override_settings(POLLS_READ_REPLICA='')
+    def test_no_replica_configured(self) -> None:
+        """
+        Without a replica everything is read from the primary.
+        """
+        with use_replica():
+            self.assertEqual(ReplicaRouter().db_for_read(Question), 'default')
+
+
+@override_settings(POLLS_READ_REPLICA='replica')
+class ReplicaRoutingMiddlewareTests(TestCase):
+    """ Tests of which requests read from the replica. """
+
+    def setUp(self):
+        self.routed = []
+
+        def get_response(request):
+            self.routed.append(reading_from_replica())
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+        self.factory = RequestFactory()
+
+    def test_index_reads_from_replica(self) -> None:
+        """
+        The index page is read from the replica.
+        """
+        self.middleware(self.factory.get(reverse('polls:index')))
+        self.assertEqual(self.routed, [True])
+
+    def test_detail_reads_from_primary(self) -> None:
+        """
+        The detail page, which shows the user's vote, is not.
+        """
+        self.middleware(self.factory.get(reverse('polls:detail', args=(1,))))
+        self.assertEqual(self.routed, [False])
+
+    def test_recent_writer_reads_from_primary(self) -> None:
+        """
+        A user who just voted reads the results from the primary.
+        """
+        request = self.factory.get(reverse('polls:results', args=(1,)))
+        request.COOKIES[READ_YOUR_WRITES_COOKIE] = '1'
+        self.middleware(request)
+        self.assertEqual(self.routed, [False])
+
+    def test_vote_sets_cookie(self) -> None:
+        """
+        Voting starts the read-your-own-writes window.
+        """
+        question = Question.objects.create(question_text="Question",
+                                           pub_date=timezone.now())
+        choice = Choice.objects.create(question=question,
+                                       choice_text="Choice")
+        self.client.force_login(User.objects.create_user(username="test"))
+        response = self.client.post(reverse('polls:vote',
+                                            args=(question.id,)),
+                                    {'choice': choice.id})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(READ_YOUR_WRITES_COOKIE, response.cookies)
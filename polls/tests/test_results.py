@@ -0,0 +1,267 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.urls import reverse
+from polls.models import Question, Choice
+from polls.live import results_delta
+from polls.results import cache_stats, question_results
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class QuestionResultsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question(question_text='Question', days=-1)
+        self.question.total_votes = 4
+        self.question.save()
+        self.choice1 = Choice.objects.create(
+            question=self.question, choice_text='Choice1', vote_count=3)
+        self.choice2 = Choice.objects.create(
+            question=self.question, choice_text='Choice2', vote_count=1)
+
+    def test_results_page_percentages(self) -> None:
+        """
+        The results page shows the votes and percentage of each choice.
+        """
+        url = reverse('polls:results', args=(self.question.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'width: 75.0%')
+        self.assertContains(response, 'width: 25.0%')
+        self.assertEqual(response.context['total_votes'], 4)
+
+    def test_results_json(self) -> None:
+        """
+        The results of a question are available as JSON.
+        """
+        url = reverse('polls:question_results_json', args=(self.question.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['results'][0]
+        self.assertEqual(result['total_votes'], 4)
+        self.assertEqual(
+            [(c['id'], c['votes'], c['percentage'])
+             for c in result['choices']],
+            [(self.choice1.id, 3, 75.0), (self.choice2.id, 1, 25.0)],
+        )
+
+    def test_batch_results_json_uses_one_query(self) -> None:
+        """
+        A batch of results is fetched with a single query and skips
+        questions that are not published.
+        """
+        other = create_question(question_text='Other', days=-2)
+        future = create_question(question_text='Future', days=2)
+        url = reverse('polls:results_json')
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, {'ids': f'{self.question.id},{other.id},{future.id}'})
+        self.assertEqual(
+            [result['id'] for result in response.json()['results']],
+            [self.question.id, other.id],
+        )
+
+    def test_batch_results_json_bad_ids(self) -> None:
+        """
+        A batch request with malformed ids is rejected.
+        """
+        response = self.client.get(reverse('polls:results_json'),
+                                   {'ids': '1,two'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_results_json_ids_out_of_range(self) -> None:
+        """
+        A batch request with ids the database cannot hold is rejected.
+        """
+        for ids in ('99999999999999999999', f'{self.question.id},-1', '0'):
+            response = self.client.get(reverse('polls:results_json'),
+                                       {'ids': ids})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json())
+
+    def test_results_are_cached(self) -> None:
+        """
+        Results are collected once and then served from the cache.
+        """
+        url = reverse('polls:question_results_json', args=(self.question.id,))
+        self.client.get(url)
+        before = cache_stats()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self.assertEqual(cache_stats()['hits'], before['hits'] + 1)
+
+    def test_cache_stats(self) -> None:
+        """
+        Staff can read the cache counters, other users cannot.
+        """
+        url = reverse('polls:stats')
+        self.client.force_login(User.objects.create_user(username="voter"))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user(username="staff",
+                                                         is_staff=True))
+        self.client.get(reverse('polls:question_results_json',
+                                args=(self.question.id,)))
+        self.assertEqual(self.client.get(url).json()['results_cache'],
+                         cache_stats())
+
+    def test_vote_updates_cached_results(self) -> None:
+        """
+        Voting writes the new results through to the cache.
+        """
+        url = reverse('polls:question_results_json', args=(self.question.id,))
+        self.client.get(url)
+
+        User.objects.create_user(username='test', password='test')
+        self.client.login(username='test', password='test')
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': self.choice2.id})
+
+        result = self.client.get(url).json()['results'][0]
+        self.assertEqual(result['total_votes'], 5)
+        self.assertEqual(result['choices'][1]['votes'], 2)
+
+
+class LiveResultsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question(question_text='Question', days=-1)
+        self.choice1 = Choice.objects.create(
+            question=self.question, choice_text='Choice1')
+        self.choice2 = Choice.objects.create(
+            question=self.question, choice_text='Choice2')
+
+    def test_delta_has_only_changed_choices(self) -> None:
+        """
+        After the full counts, an update only carries the choices whose
+        votes changed, and nothing is sent when no vote changed.
+        """
+        result = question_results([self.question.id])[self.question.id]
+        sent = {}
+        self.assertEqual(
+            results_delta(result, sent),
+            {'total': 0,
+             'choices': {str(self.choice1.id): 0, str(self.choice2.id): 0}},
+        )
+        self.assertIsNone(results_delta(result, sent))
+
+        result['total_votes'] = 1
+        result['choices'][1]['votes'] = 1
+        self.assertEqual(
+            results_delta(result, sent),
+            {'total': 1, 'choices': {str(self.choice2.id): 1}},
+        )
+
+    def test_stream_sends_counts(self) -> None:
+        """
+        The stream endpoint sends the counts as a Server-Sent Event.
+        """
+        url = reverse('polls:results_stream', args=(self.question.id,))
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn('retry: ', body)
+        self.assertIn(f'"{self.choice1.id}": 0', body)
+
+    def test_stream_of_missing_question(self) -> None:
+        """
+        The stream of a question that does not exist is not found.
+        """
+        url = reverse('polls:results_stream', args=(999,))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ConditionalResultsTests(TestCase):
+    """ Tests of conditional GETs of the results page. """
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question(question_text="Question", days=-1)
+        self.choice = Choice.objects.create(question=self.question,
+                                            choice_text="Choice")
+        self.url = reverse('polls:results', args=(self.question.id,))
+
+    def test_not_modified(self) -> None:
+        """
+        The results page is not sent again while nothing changed.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_modified_by_vote(self) -> None:
+        """
+        A vote changes the ETag and the Last-Modified date.
+        """
+        first = self.client.get(self.url)
+        user = User.objects.create_user(username="voter", password="voter")
+        self.client.force_login(user)
+        self.client.post(reverse('polls:vote', args=(self.question.id,)),
+                         {'choice': self.choice.id})
+        response = self.client.get(self.url,
+                                   HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertContains(response, '<td class="total-votes">1</td>',
+                            html=False)
+
+    def test_modified_by_edit(self) -> None:
+        """
+        Editing a choice changes the ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        self.choice.choice_text = "Edited"
+        self.choice.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Edited")
+
+    def test_modified_since_edit(self) -> None:
+        """
+        A request with only If-Modified-Since gets the page again after
+        a choice was edited, as Last-Modified follows the edit.
+        """
+        Question.objects.filter(pk=self.question.pk).update(
+            modified=timezone.now() - datetime.timedelta(days=1))
+        cache.clear()
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.choice.choice_text = "Edited"
+        self.choice.save()
+        response = self.client.get(self.url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertContains(response, "Edited")
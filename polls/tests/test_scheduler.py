@@ -0,0 +1,116 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from polls.models import Question, Choice
+from polls.scheduler import CLOSE, OPEN, PollScheduler, cache_is_shared
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class PollSchedulerTests(TestCase):
+    """ Tests of the open and close hooks of the poll scheduler. """
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.question = create_question(question_text="Question", hours=1,
+                                        end_time=1)
+        Choice.objects.create(question=self.question, choice_text="Choice")
+        self.scheduler = PollScheduler(open_lead=60)
+        self.scheduler.refresh(self.now)
+
+    def later(self, **delta):
+        return self.now + datetime.timedelta(**delta)
+
+    def test_open_warms_caches(self) -> None:
+        """
+        The open hook runs shortly before pub_date and warms the caches,
+        so the first views of the poll run no query for it.
+        """
+        self.assertEqual(self.scheduler.run_due(self.later(minutes=58)), [])
+        self.assertEqual(self.scheduler.run_due(self.later(minutes=59, seconds=1)),
+                         [(OPEN, self.question.pk)])
+        with self.assertNumQueries(0):
+            self.assertIn(f'polls:results:{self.question.pk}', cache)
+            self.assertIn(f'polls:question:{self.question.pk}', cache)
+
+    def test_close_finalizes(self) -> None:
+        """
+        The close hook finalizes the poll after its end_date.
+        """
+        ran = self.scheduler.run_due(self.later(days=2))
+        self.assertEqual(ran, [(OPEN, self.question.pk),
+                               (CLOSE, self.question.pk)])
+        self.question.refresh_from_db()
+        self.assertIsNotNone(self.question.finalized_at)
+
+    def test_edit_reschedules(self) -> None:
+        """
+        A new end_date is picked up and the old one is skipped.
+        """
+        self.question.end_date = self.later(days=3)
+        self.question.save()
+        self.assertEqual(self.scheduler.refresh(self.now), 1)
+        self.assertEqual(self.scheduler.run_due(self.later(days=2)),
+                         [(OPEN, self.question.pk)])
+        self.assertEqual(self.scheduler.run_due(self.later(days=4)),
+                         [(CLOSE, self.question.pk)])
+
+    def test_refresh_reads_only_edits(self) -> None:
+        """
+        A refresh reads nothing new when no question changed.
+        """
+        self.assertEqual(self.scheduler.refresh(self.now), 0)
+
+    def test_command_once(self) -> None:
+        """
+        run_poll_scheduler --once finalizes the polls already closed.
+        """
+        Question.objects.filter(pk=self.question.pk).update(
+            pub_date=self.later(days=-2), end_date=self.later(days=-1))
+        out = StringIO()
+        call_command('run_poll_scheduler', '--once', '--allow-local-cache',
+                     stdout=out, stderr=StringIO())
+        self.assertIn(f"Ran the close hook of question {self.question.pk}",
+                      out.getvalue())
+
+    def test_command_needs_shared_cache(self) -> None:
+        """
+        run_poll_scheduler refuses a cache the web workers cannot see.
+        """
+        with self.assertRaisesMessage(CommandError, "CACHE_BACKEND"):
+            call_command('run_poll_scheduler', '--once')
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': 'redis://localhost:6379'}}):
+            self.assertTrue(cache_is_shared())
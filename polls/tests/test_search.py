@@ -0,0 +1,182 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from polls.importer import CatalogImporter
+from polls.models import Question, Choice
+from polls.search import search_questions, search_terms
+from polls.tests.utils import QueryBudgetMixin
+from polls.views import MAX_SEARCH_PAGE
+
+
+def create_question(question_text="",
+                    days=0, hours=0, minutes=0, seconds=0,
+                    end_time=None) -> Question:
+    """
+    Create a question with the given `question_text` and published the
+    given number of `days` offset to now (negative for questions published
+    in the past, positive for questions that have yet to be published).
+    """
+    time = timezone.now() + datetime.timedelta(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        seconds=seconds
+    )
+    if end_time is None:
+        return Question.objects.create(
+            question_text=question_text,
+            pub_date=time
+        )
+
+    time_end = timezone.now() + datetime.timedelta(days=end_time)
+    return Question.objects.create(
+        question_text=question_text,
+        pub_date=time,
+        end_date=time_end
+    )
+
+
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.color = create_question(question_text="Favourite colour?",
+                                     days=-2)
+        Choice.objects.create(question=self.color, choice_text="Green")
+        self.food = create_question(question_text="Lunch today?", days=-1)
+        Choice.objects.create(question=self.food, choice_text="Green curry")
+
+    def test_search_terms(self) -> None:
+        """
+        Each word must match, the last one as a prefix, and FTS5 syntax
+        typed by users is not interpreted.
+        """
+        self.assertEqual(search_terms('fav "col'), '"fav" "col"*')
+        self.assertEqual(search_terms('OR ('), '"OR"*')
+        self.assertEqual(search_terms(' -* '), '')
+
+    def test_ranked_by_question_text_first(self) -> None:
+        """
+        A match in the question text ranks above a match in a choice.
+        """
+        curry = create_question(question_text="Green or red?", days=-3)
+        questions, has_next = search_questions("green")
+        self.assertEqual(questions[0], curry)
+        self.assertEqual(set(questions), {curry, self.color, self.food})
+        self.assertFalse(has_next)
+
+    def test_prefix_and_diacritics(self) -> None:
+        """
+        The last word matches as a prefix, and accents are ignored.
+        """
+        Choice.objects.create(question=self.food, choice_text="Crème brûlée")
+        self.assertEqual(search_questions("favou")[0], [self.color])
+        self.assertEqual(search_questions("creme brul")[0], [self.food])
+
+    def test_kept_in_sync(self) -> None:
+        """
+        Edits and deletions of questions and choices update the index.
+        """
+        self.color.question_text = "Favourite fruit?"
+        self.color.save()
+        self.assertEqual(search_questions("colour")[0], [])
+        self.food.choice_set.all().delete()
+        self.assertEqual(search_questions("curry")[0], [])
+        self.color.delete()
+        self.assertEqual(search_questions("fruit")[0], [])
+
+    def test_unpublished_questions_are_hidden(self) -> None:
+        """
+        Questions not published yet are not found.
+        """
+        create_question(question_text="Future colour", days=1)
+        self.assertEqual(search_questions("colour")[0], [self.color])
+
+    def test_pages(self) -> None:
+        """
+        Results come page_size at a time.
+        """
+        first, has_next = search_questions("green", page_size=1)
+        second, has_more = search_questions("green", page=2, page_size=1)
+        self.assertTrue(has_next)
+        self.assertFalse(has_more)
+        self.assertNotEqual(first, second)
+
+    def test_import_and_rebuild(self) -> None:
+        """
+        Imported questions are indexed, and the rebuild command rewrites
+        the whole index.
+        """
+        CatalogImporter().run([{
+            'model': 'polls.question', 'pk': 100,
+            'fields': {'question_text': "Imported survey",
+                       'pub_date': "2023-09-01T00:00:00Z"},
+        }])
+        self.assertEqual(len(search_questions("survey")[0]), 1)
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM polls_question_search")
+        output = StringIO()
+        call_command('rebuild_search_index', stdout=output)
+        self.assertIn("Indexed 3 questions", output.getvalue())
+        self.assertEqual(len(search_questions("survey")[0]), 1)
+
+
+@override_settings(POLLS_PAGE_SIZE=1)
+class SearchViewTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.old = create_question(question_text="Old colour poll", days=-5)
+        self.new = create_question(question_text="New colour poll", days=-1)
+        self.user = User.objects.create_user(username="test")
+        self.client.force_login(self.user)
+
+    def test_search_page(self) -> None:
+        """
+        The search page lists the matches with a link to the next page.
+        """
+        response = self.client.get(reverse('polls:search'),
+                                   {'q': "colour"})
+        self.assertEqual(len(response.context['latest_question_list']), 1)
+        self.assertContains(response, 'value="colour"')
+        self.assertContains(response, "?q=colour&page=2")
+
+    def test_no_match(self) -> None:
+        """
+        A search without matches says so.
+        """
+        response = self.client.get(reverse('polls:search'), {'q': "zebra"})
+        self.assertContains(response, 'No polls match "zebra".')
+
+    def test_page_out_of_range(self) -> None:
+        """
+        A page too large to query is not found, an empty page in range is
+        shown.
+        """
+        response = self.client.get(reverse('polls:search'),
+                                   {'q': "colour",
+                                    'page': "99999999999999999999999"})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('polls:search'),
+                                   {'q': "colour", 'page': MAX_SEARCH_PAGE})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['latest_question_list'])
+
+    def test_search_box_on_index(self) -> None:
+        """
+        The index page has the search box.
+        """
+        response = self.client.get(reverse('polls:index'))
+        self.assertContains(response, f'action="{reverse("polls:search")}"')
+
+    def test_search_budget(self) -> None:
+        with self.assertWithinQueryBudget('polls:search'):
+            response = self.client.get(reverse('polls:search'),
+                                       {'q': "poll"})
+        self.assertIn('Server-Timing', response)
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from polls.sqlite import configure_sqlite, retry_if_locked
+
+
+class SQLitePragmaTests(TestCase):
+    """ Tests of the PRAGMAs applied to new SQLite connections. """
+
+    def test_pragmas_applied(self) -> None:
+        """
+        The busy timeout and cache size of the settings are in effect.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -20000)
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': '1; DROP TABLE x'})
+    def test_invalid_pragma_value(self) -> None:
+        """
+        A PRAGMA value that is not a plain word or number is refused.
+        """
+        with self.assertRaises(ValueError):
+            configure_sqlite(None, connection)
+
+
+@override_settings(SQLITE_LOCK_RETRIES=2, SQLITE_LOCK_RETRY_DELAY=0)
+class RetryIfLockedTests(SimpleTestCase):
+    """ Tests of retrying writes when the database is locked. """
+
+    def test_retried_until_unlocked(self) -> None:
+        """
+        A write that finds the database locked is run again.
+        """
+        write = mock.Mock(side_effect=[
+            OperationalError("database is locked"), 'done'])
+        write.__name__ = 'write'
+        with self.assertLogs('polls.sqlite', 'WARNING'):
+            self.assertEqual(retry_if_locked(write)(), 'done')
+        self.assertEqual(write.call_count, 2)
+
+    def test_gives_up_after_retries(self) -> None:
+        """
+        The error is raised once the retries are used up.
+        """
+        write = mock.Mock(side_effect=OperationalError("database is locked"))
+        write.__name__ = 'write'
+        with self.assertLogs('polls.sqlite', 'WARNING'), \
+                self.assertRaises(OperationalError):
+            retry_if_locked(write)()
+        self.assertEqual(write.call_count, 3)
+
+    def test_other_errors_not_retried(self) -> None:
+        """
+        Errors other than a locked database are raised at once.
+        """
+        write = mock.Mock(side_effect=OperationalError("no such table"))
+        write.__name__ = 'write'
+        with self.assertRaises(OperationalError):
+            retry_if_locked(write)()
+        self.assertEqual(write.call_count, 1)
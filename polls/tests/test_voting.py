@@ -1,9 +1,16 @@
 import datetime
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase, Client
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, transaction
+from django.test import TestCase, TransactionTestCase, Client
 from django.utils import timezone
 from django.urls import reverse
-from polls.models import Question, Choice
+from polls.archive import finalize_question
+from polls.ingest import VoteBuffer
+from polls.models import Question, Choice, Vote
+from polls.voting import VotingClosed, cast_vote
 from django.contrib.auth.models import User
 
 
@@ -71,3 +78,204 @@ class QuestionVotingTests(TestCase):
 
         choice_vote = Choice.objects.get(id=self.choice.id)
         self.assertEqual(choice_vote.votes, 0)
+
+    def test_vote_without_choice(self) -> None:
+        """
+        A vote without a valid choice shows the detail page again with
+        its choices and an error, and records nothing.
+        """
+        User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        self.client.login(username=self.username, password=self.password)
+        url = reverse('polls:vote', args=(self.question.id,))
+
+        for data in ({}, {'choice': self.choice.id + 100}):
+            response = self.client.post(url, data)
+            self.assertContains(response, "select a choice.")
+            self.assertContains(response, 'Choice1')
+        self.assertFalse(Vote.objects.exists())
+
+    def test_vote_on_finalized_poll(self) -> None:
+        """
+        A finalized poll takes no more votes, so its results stay frozen.
+        """
+        Question.objects.filter(pk=self.question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(days=1))
+        finalize_question(self.question.id)
+        User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        self.client.login(username=self.username, password=self.password)
+
+        url = reverse('polls:vote', args=(self.question.id,))
+        response = self.client.post(url, {'choice': self.choice.id})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+        self.assertEqual(Choice.objects.get(id=self.choice.id).votes, 0)
+        self.assertEqual(
+            Question.objects.get(id=self.question.id).total_votes, 0)
+
+    def test_vote_on_closed_poll(self) -> None:
+        """
+        cast_vote() refuses a closed poll even if the view let it through.
+        """
+        user = User.objects.create_user(username=self.username)
+        Question.objects.filter(pk=self.question.pk).update(
+            end_date=timezone.now() - datetime.timedelta(days=1))
+        with self.assertRaises(VotingClosed):
+            cast_vote(user, self.question, self.choice)
+        self.assertFalse(Vote.objects.exists())
+        self.assertEqual(Choice.objects.get(id=self.choice.id).votes, 0)
+
+    def test_switch_vote_moves_tally(self) -> None:
+        """
+        Changing a vote takes it off the old choice and
+        adds it to the new one, without changing the total.
+        """
+        other_choice = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice2'
+        )
+        User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        self.client.login(username=self.username, password=self.password)
+        url = reverse('polls:vote', args=(self.question.id,))
+        self.client.post(url, {'choice': self.choice.id})
+        self.client.post(url, {'choice': other_choice.id})
+
+        self.assertEqual(Choice.objects.get(id=self.choice.id).votes, 0)
+        self.assertEqual(Choice.objects.get(id=other_choice.id).votes, 1)
+        self.assertEqual(
+            Question.objects.get(id=self.question.id).total_votes, 1)
+
+    def test_rebuild_tallies(self) -> None:
+        """
+        The rebuild_tallies command recounts stale tallies
+        from the Vote table.
+        """
+        user = User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        Vote.objects.create(user=user, choice=self.choice)
+
+        call_command('rebuild_tallies', stdout=StringIO())
+
+        self.assertEqual(Choice.objects.get(id=self.choice.id).votes, 1)
+        self.assertEqual(
+            Question.objects.get(id=self.question.id).total_votes, 1)
+
+    def test_one_vote_per_question(self) -> None:
+        """
+        The database refuses a second vote row of a user on a question.
+        """
+        other_choice = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice2'
+        )
+        user = User.objects.create_user(
+            username=self.username,
+            password=self.password
+        )
+        Vote.objects.create(user=user, choice=self.choice)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Vote.objects.create(user=user, choice=other_choice)
+        self.assertEqual(Vote.objects.filter(user=user).count(), 1)
+
+
+class BufferedVotingTests(TestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text='Question')
+        self.choice1 = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice1'
+        )
+        self.choice2 = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice2'
+        )
+        self.users = [
+            User.objects.create_user(username=f'user{n}', password='test')
+            for n in range(3)
+        ]
+
+    def test_flush_coalesces_votes(self) -> None:
+        """
+        Only the last buffered vote of a user on a question is written,
+        and the tallies count it once.
+        """
+        buffer = VoteBuffer(batch_size=2, flush_interval=1, limit=100)
+        buffer.submit(self.users[0].id, self.question.id, self.choice1.id)
+        buffer.submit(self.users[1].id, self.question.id, self.choice1.id)
+        buffer.submit(self.users[0].id, self.question.id, self.choice2.id)
+        buffer.submit(self.users[2].id, self.question.id, self.choice2.id)
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(
+            Vote.objects.get(user=self.users[0]).choice, self.choice2)
+        self.assertEqual(Choice.objects.get(id=self.choice1.id).votes, 1)
+        self.assertEqual(Choice.objects.get(id=self.choice2.id).votes, 2)
+        self.assertEqual(
+            Question.objects.get(id=self.question.id).total_votes, 3)
+
+    def test_full_buffer_refuses_votes(self) -> None:
+        """
+        A full buffer refuses new votes so the caller writes them itself.
+        """
+        buffer = VoteBuffer(batch_size=10, flush_interval=1, limit=1)
+        self.assertTrue(
+            buffer.submit(self.users[0].id, self.question.id, self.choice1.id))
+        self.assertFalse(
+            buffer.submit(self.users[1].id, self.question.id, self.choice1.id))
+
+
+class BufferedVotingFailureTests(TransactionTestCase):
+
+    def setUp(self):
+        self.question = create_question(question_text='Question')
+        self.choice = Choice.objects.create(
+            question=self.question,
+            choice_text='Choice1'
+        )
+        self.users = [
+            User.objects.create_user(username=f'user{n}', password='test')
+            for n in range(3)
+        ]
+
+    def test_unwritable_vote_is_dropped(self) -> None:
+        """
+        A vote that can never be written is dropped without holding back
+        the other votes of its batch.
+        """
+        buffer = VoteBuffer(batch_size=10, flush_interval=1, limit=100)
+        for user in self.users:
+            buffer.submit(user.id, self.question.id, self.choice.id)
+        self.users[1].delete()
+
+        with self.assertLogs('polls.ingest', 'ERROR') as logs:
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.assertEqual(Choice.objects.get(id=self.choice.id).votes, 2)
+
+    def test_transient_error_requeues(self) -> None:
+        """
+        Votes that hit a transient database error wait for the next flush.
+        """
+        buffer = VoteBuffer(batch_size=10, flush_interval=1, limit=100)
+        buffer.submit(self.users[0].id, self.question.id, self.choice.id)
+        with mock.patch('polls.ingest.apply_votes',
+                        side_effect=OperationalError("database is locked")), \
+                self.assertLogs('polls.ingest', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending(), 1)
+        self.assertEqual(buffer.flush(), 1)
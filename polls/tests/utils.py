@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """ TestCase mixin to check that a view stays within its query budget
+    in POLLS_QUERY_BUDGETS.
+    """
+
+    @contextmanager
+    def assertWithinQueryBudget(self, view_name: str, using='default'):
+        budget = settings.POLLS_QUERY_BUDGETS[view_name]
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        queries = "\n".join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f"{view_name} ran {len(context)} queries, over its budget of "
+            f"{budget}:\n{queries}")
@@ -1,10 +1,39 @@
 from django.urls import path
-from polls import views
+from polls import api, async_views, views
 
 app_name = 'polls'  # namespace
-urlpatterns = [
-    path('', views.IndexView.as_view(), name='index'),
-    path('<int:pk>/', views.DetailView.as_view(), name='detail'),
-    path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
-    path('<int:question_id>/vote/', views.vote, name='vote'),
-]
+
+
+def polls_patterns(detail_view, results_view, vote_view):
+    """
+    Returns the URL patterns of the polls app, with the given views for
+    the detail, results and vote pages.
+    """
+    return [
+        path('', views.IndexView.as_view(), name='index'),
+        path('search/', views.SearchView.as_view(), name='search'),
+        path('<int:pk>/', detail_view, name='detail'),
+        path('<int:pk>/results/', results_view, name='results'),
+        path('<int:pk>/results/stream/', async_views.results_stream,
+             name='results_stream'),
+        path('<int:question_id>/vote/', vote_view, name='vote'),
+        path('results.json', views.results_json, name='results_json'),
+        path('<int:pk>/results.json', views.results_json,
+             name='question_results_json'),
+        path('stats.json', views.stats, name='stats'),
+        path('export/votes/', views.export_votes, name='export_votes'),
+        path('export/results/', views.export_results,
+             name='export_results'),
+        path('api/questions/', api.question_list, name='api_questions'),
+        path('api/questions/<int:pk>/', api.question_detail,
+             name='api_question'),
+        path('api/questions/<int:pk>/vote/', api.my_vote, name='api_vote'),
+        path('api/ballots/', api.ballots, name='api_ballots'),
+    ]
+
+
+urlpatterns = polls_patterns(
+    views.DetailView.as_view(),
+    views.ResultsView.as_view(),
+    views.vote,
+)
@@ -0,0 +1,9 @@
+from polls import async_views
+from polls.urls import polls_patterns
+
+app_name = 'polls'  # namespace
+urlpatterns = polls_patterns(
+    async_views.DetailView.as_view(),
+    async_views.ResultsView.as_view(),
+    async_views.vote,
+)
@@ -1,10 +1,25 @@
 from django.http import HttpResponse, HttpRequest, HttpResponseRedirect
-from polls.models import Question, Choice, Vote
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from polls import export
+from polls.conditional import catalog_version, has_messages, index_etag
+from polls.conditional import results_etag, results_last_modified
+from polls.ingest import get_vote_buffer
+from polls.models import Question, Choice, Vote, ArchivedVote, MAX_ID
+from polls.pagination import akeyset_page, keyset_page
+from polls.questions import cached_question
+from polls.ratelimit import rate_limit, rate_limit_stats
+from polls.results import cache_stats, cached_results, refresh_results
+from polls.search import SearchUnavailable, search_questions
+from polls.voting import VotingClosed, cast_vote
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views import generic
 from django.utils import timezone
 from django.http import Http404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth import login, authenticate
@@ -12,25 +27,154 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 
 
+# poll statuses the index can be filtered by
+POLL_STATUSES = ('open', 'closed')
+
+# the last page of search results, far past any real search but small
+# enough for its offset to fit in an SQLite integer
+MAX_SEARCH_PAGE = 10000
+
+
+def _questions_by_status(status: str = None):
+    now = timezone.now()
+    questions = Question.objects.with_status(now)
+    if status == 'open':
+        return questions.open(now)
+    if status == 'closed':
+        return questions.closed(now)
+    return questions.published(now)
+
+
+def latest_questions(cursor: str = None, status: str = None):
+    """
+    Returns a page of the latest published questions (excluding those set
+    to be published in the future), each annotated with ``is_open``, and
+    the cursor of the next page. ``status`` may limit the page to open or
+    closed polls.
+    """
+    return keyset_page(_questions_by_status(status), cursor,
+                       settings.POLLS_PAGE_SIZE)
+
+
+async def alatest_questions(cursor: str = None, status: str = None):
+    """
+    Async version of latest_questions().
+    """
+    return await akeyset_page(_questions_by_status(status), cursor,
+                              settings.POLLS_PAGE_SIZE)
+
+
 class IndexView(generic.ListView):
     """ Index view for the polls app.
 
     Methods:
-        get_queryset(): Returns the last five published question.
+        get_queryset(): Returns a page of the latest published questions.
     """
     template_name = 'polls/index.html'
     context_object_name = 'latest_question_list'
 
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """
+        Answers 304 Not Modified without building the page when the
+        client already has it, as told by its ETag.
+        """
+        if has_messages(request):
+            return super().get(request, *args, **kwargs)
+
+        etag = index_etag(request, request.GET.get('status'),
+                          request.GET.get('cursor'))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     def get_queryset(self):
         """
-        Returns the last five published questions
-        (excluding those set to be published in the future).
+        Returns the page of published questions after the ``cursor``
+        query parameter, newest first, POLLS_PAGE_SIZE at a time.
+        The ``status`` query parameter limits it to open or closed polls.
 
         Returns:
-            QuerySet: A queryset containing the latest published questions.
+            list: The questions on the requested page.
+        """
+        self.status = self.request.GET.get('status')
+        if self.status not in POLL_STATUSES:
+            self.status = None
+        page, self.next_cursor = latest_questions(
+            self.request.GET.get('cursor'), self.status)
+        return page
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        context['is_first_page'] = not self.request.GET.get('cursor')
+        context['status'] = self.status
+        context['fragment_ttl'] = settings.INDEX_FRAGMENT_TTL
+        return context
+
+
+class SearchView(generic.ListView):
+    """ Full-text search of the published questions by their text and the
+    text of their choices, best match first, on the index page.
+    """
+    template_name = 'polls/index.html'
+    context_object_name = 'latest_question_list'
+
+    def get_queryset(self):
         """
-        return Question.objects.filter(pub_date__lte=timezone.now())\
-            .order_by('-pub_date')
+        Returns the page (``page`` query parameter) of the questions
+        matching the ``q`` query parameter, POLLS_PAGE_SIZE at a time.
+
+        Raises:
+            Http404: If the page is past MAX_SEARCH_PAGE.
+        """
+        self.query = self.request.GET.get('q', '').strip()
+        try:
+            self.page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            self.page = 1
+        if self.page > MAX_SEARCH_PAGE:
+            raise Http404("That page contains no results.")
+        try:
+            questions, self.has_next = search_questions(
+                self.query, self.page, settings.POLLS_PAGE_SIZE)
+        except SearchUnavailable:
+            raise Http404("Search is not available.")
+        return questions
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['page'] = self.page
+        context['previous_page'] = self.page - 1
+        context['next_page'] = self.page + 1 if self.has_next else None
+        context['fragment_ttl'] = settings.INDEX_FRAGMENT_TTL
+        return context
+
+
+def voted_choice_ids(user, question: Question):
+    """
+    Returns the query of the id of the choice the user voted for, in one
+    query whether the vote is live or, once the poll is finalized, has
+    been archived.
+    """
+    choice_ids = Vote.objects.filter(user=user, question=question)\
+        .values_list('choice_id', flat=True)
+    if question.finalized_at is not None:
+        choice_ids = choice_ids.union(
+            ArchivedVote.objects.filter(user=user, question=question)
+            .values_list('choice_id', flat=True))
+    return choice_ids
+
+
+def find_choice(choices: list, choice_ids: list):
+    """
+    Returns the choice of the list with one of the given ids, or None.
+    """
+    return next((choice for choice in choices if choice.pk in choice_ids),
+                None)
 
 
 class DetailView(LoginRequiredMixin, generic.DetailView):
@@ -53,24 +197,21 @@ class DetailView(LoginRequiredMixin, generic.DetailView):
 
         this_user = request.user
 
-        try:
-            question = get_object_or_404(Question, pk=kwargs["pk"])
-        except Http404:
+        entry = cached_question(kwargs["pk"])
+        if entry is None:
             messages.error(
                 request,
                 f"Question number {kwargs['pk']} does not exists.❗️")
             return redirect("polls:index")
+        question, choices = entry
 
-        try:
-            vote = Vote.objects.get(user=this_user, choice__question=question)
-            selected_choice = vote.choice
-            has_voted = True
-        except Vote.DoesNotExist:
-            has_voted = False
-            selected_choice = None
+        choice_ids = list(voted_choice_ids(this_user, question)[:1])
+        selected_choice = find_choice(choices, choice_ids)
+        has_voted = selected_choice is not None
 
         context = {
             'question': question,
+            'choices': choices,
             'has_voted': has_voted,
             'choice_text': selected_choice,
             'selected_choice': selected_choice,
@@ -92,20 +233,137 @@ class ResultsView(generic.DetailView):
     template_name = 'polls/results.html'
 
     def get(self, request: HttpRequest, **kwargs) -> HttpResponse:
-        try:
-            question = get_object_or_404(Question, pk=kwargs["pk"])
-        except Http404:
+        results = cached_results([kwargs["pk"]]).get(kwargs["pk"])
+        if results is None:
             messages.error(
                 request,
                 f"Result question number {kwargs['pk']} does not exists.❗️")
             return redirect("polls:index")
 
-        total_votes = \
-            sum([choice.votes for choice in question.choice_set.all()])
-        context = {'question': question, 'total_votes': total_votes}
-        return render(request, 'polls/results.html', context)
+        return render_results(request, results, catalog_version())
+
+
+def render_results(request: HttpRequest, results: dict,
+                   version: int) -> HttpResponse:
+    """
+    Renders the results page of a question, or answers 304 Not Modified
+    if the client has the current one, as told by its ETag or
+    Last-Modified date.
+    """
+    etag = results_etag(results, version)
+    last_modified = results_last_modified(results)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        context = {
+            'question': results,
+            'choices': results['choices'],
+            'total_votes': results['total_votes'],
+        }
+        response = render(request, 'polls/results.html', context)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+# the most questions results_json returns in one request
+MAX_RESULTS_BATCH = 100
+
+
+def results_json(request: HttpRequest, pk: int = None) -> JsonResponse:
+    """ Results of one question, or of a batch of questions given as
+    ``?ids=1,2,3``, as JSON.
+    """
+    if pk is not None:
+        question_ids = [pk]
+    else:
+        try:
+            question_ids = [int(question_id) for question_id
+                            in request.GET.get('ids', '').split(',')
+                            if question_id.strip()]
+            # larger ids cannot be queried, and there are no such questions
+            if not all(1 <= question_id <= MAX_ID
+                       for question_id in question_ids):
+                raise ValueError
+        except ValueError:
+            return JsonResponse(
+                {'error': "ids must be a comma separated list of numbers."},
+                status=400)
+        if not question_ids or len(question_ids) > MAX_RESULTS_BATCH:
+            return JsonResponse(
+                {'error': f"Give between 1 and {MAX_RESULTS_BATCH} ids."},
+                status=400)
+
+    results = cached_results(question_ids, published_before=timezone.now())
+    if pk is not None and not results:
+        return JsonResponse(
+            {'error': f"Question number {pk} does not exists."}, status=404)
+
+    return JsonResponse({'results': [
+        results[question_id] for question_id in dict.fromkeys(question_ids)
+        if question_id in results
+    ]})
 
 
+@staff_member_required
+def stats(request: HttpRequest) -> JsonResponse:
+    """ Staff-only counters of the process that answers, as JSON: the
+    hits and misses of the results cache and the requests rejected by
+    each rate limit.
+    """
+    return JsonResponse({'results_cache': cache_stats(),
+                         'rate_limits': rate_limit_stats()})
+
+
+def _export(request: HttpRequest, kind: str) -> HttpResponse:
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.EXPORT_FORMATS:
+        return HttpResponse("format must be csv or ndjson.", status=400)
+    try:
+        question_ids = [int(question_id) for question_id
+                        in request.GET.getlist('question')]
+        since = export.parse_date_bound(request.GET.get('since'))
+        until = export.parse_date_bound(request.GET.get('until'))
+    except ValueError as exc:
+        return HttpResponse(str(exc), status=400)
+
+    if kind == 'votes':
+        rows = export.vote_rows(question_ids, since, until)
+        columns = export.VOTE_COLUMNS
+    else:
+        rows = export.result_rows(question_ids, since, until)
+        columns = export.RESULT_COLUMNS
+
+    content_type = 'text/csv' if export_format == 'csv' \
+        else 'application/x-ndjson'
+    response = StreamingHttpResponse(
+        export.export_lines(rows, columns, export_format),
+        content_type=content_type)
+    response['Content-Disposition'] = \
+        f'attachment; filename="{kind}.{export_format}"'
+    return response
+
+
+@staff_member_required
+def export_votes(request: HttpRequest) -> HttpResponse:
+    """ Staff-only download of every vote as CSV or NDJSON
+    (``?format=csv|ndjson``), optionally only those on some questions
+    (``?question=1&question=2``) or on questions published in a date
+    range (``?since=2023-09-01&until=2023-10-01``).
+    """
+    return _export(request, 'votes')
+
+
+@staff_member_required
+def export_results(request: HttpRequest) -> HttpResponse:
+    """ Staff-only download of the results of each question, with the same
+    parameters as export_votes.
+    """
+    return _export(request, 'results')
+
+
+@rate_limit('vote')
 @login_required
 def vote(request: HttpRequest, question_id: int) -> HttpResponse:
     """ Vote view for the polls app. """
@@ -114,33 +372,46 @@ def vote(request: HttpRequest, question_id: int) -> HttpResponse:
 
     if not this_user.is_authenticated:
         return redirect('login')
+    # closed polls, and finalized ones whose results are frozen, take no
+    # votes, as the detail page does not show them the form
+    if question.finalized_at is not None or not question.can_vote():
+        raise Http404
 
     try:
         selected_choice = question.choice_set.get(pk=request.POST['choice'])
     except (KeyError, Choice.DoesNotExist):
         return render(request, 'polls/detail.html', {
             'question': question,
+            'choices': question.choice_set.all(),
             'error_message': "You didn't select a choice.❗",
         })
 
+    vote_buffer = get_vote_buffer()
+    if vote_buffer is not None and vote_buffer.submit(
+            this_user.id, question.id, selected_choice.id):
+        return HttpResponseRedirect(
+            reverse('polls:results', args=(question.id,)))
+
     try:
-        vote = Vote.objects.get(user=this_user, choice__question=question)
-        vote.choice = selected_choice
-        question_objects = Question.objects.filter(
-            pub_date__lte=timezone.now()).order_by('-pub_date')
-        vote.save()
+        switched = cast_vote(this_user, question, selected_choice)
+    except VotingClosed:
+        raise Http404
+    refresh_results(question.id)
+
+    if switched:
+        question_objects, next_cursor = latest_questions()
         return render(request, 'polls/index.html',
                       {'message': '⭐️ Vote successfully updated ⭐️️',
                        'latest_question_list': question_objects,
+                       'next_cursor': next_cursor,
+                       'is_first_page': True,
+                       'fragment_ttl': settings.INDEX_FRAGMENT_TTL,
                        'choice_id': question_id})
 
-    except Vote.DoesNotExist:
-        vote = Vote.objects.create(user=this_user, choice=selected_choice)
-        vote.save()
-
     return HttpResponseRedirect(reverse('polls:results', args=(question.id,)))
 
 
+@rate_limit('signup')
 def signup(request) -> HttpResponse:
     """Register a new user."""
     if request.method == 'POST':
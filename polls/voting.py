@@ -0,0 +1,208 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from polls.models import Question, Choice, Vote
+from polls.sqlite import retry_if_locked
+
+
+class VotingClosed(Exception):
+    """ Raised when a vote is cast on a poll that does not accept votes. """
+
+
+@retry_if_locked
+def cast_vote(user, question: Question, choice: Choice) -> bool:
+    """
+    Records the vote of a user for a choice and keeps the stored tallies
+    of the choice and its question in step, all in one transaction.
+
+    The vote row is written with a single upsert on the unique
+    (user, question) constraint, so concurrent votes of the same user
+    can never leave two rows behind.
+
+    Returns:
+        bool: True if the user had already voted on the question (the vote
+        was switched), False if this is a new vote.
+
+    Raises:
+        VotingClosed: If the question is not open or is finalized, in
+        which case nothing is written.
+    """
+    with transaction.atomic():
+        old_choice_id = Vote.objects.select_for_update()\
+            .filter(user=user, question=question)\
+            .values_list('choice_id', flat=True).first()
+        if old_choice_id == choice.pk:
+            return True
+
+        Vote.objects.bulk_create(
+            [Vote(user=user, question=question, choice=choice,
+                  cast_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['user', 'question'],
+            update_fields=['choice', 'cast_at'],
+        )
+        Choice.objects.filter(pk=choice.pk)\
+            .update(vote_count=F('vote_count') + 1)
+        if old_choice_id is not None:
+            Choice.objects.filter(pk=old_choice_id)\
+                .update(vote_count=F('vote_count') - 1)
+
+        changes = _results_changed()
+        if old_choice_id is None:
+            changes['total_votes'] = F('total_votes') + 1
+        # checked by the same UPDATE, so a poll closing meanwhile rolls
+        # the vote back rather than changing its frozen results
+        if not Question.objects.open().filter(
+                pk=question.pk, finalized_at__isnull=True).update(**changes):
+            raise VotingClosed(f"Question {question.pk} is closed.")
+        return old_choice_id is not None
+
+
+def _results_changed() -> dict:
+    """
+    Returns the updates that mark the results of questions as changed.
+    """
+    return {'results_version': F('results_version') + 1,
+            'results_updated': timezone.now()}
+
+
+def _add_to_tallies(model, field: str, deltas: Counter) -> None:
+    """
+    Adds each delta to the tally of its row, with one UPDATE for all
+    the rows that change by the same amount.
+    """
+    by_delta = {}
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+@retry_if_locked
+def apply_votes(ballots) -> set:
+    """
+    Records a batch of votes with bulk operations in one transaction and
+    keeps the stored tallies in step. When a user votes on a question more
+    than once in the batch, the last vote wins. A vote cast before the
+    one already recorded for its user and question is skipped, and so
+    are votes on finalized questions, whose results are frozen.
+
+    Args:
+        ballots: (user id, question id, choice id) of each vote, oldest
+            first, optionally followed by when it was cast (default: now).
+            The choices must belong to their questions.
+
+    Returns:
+        set: The ids of the questions whose votes changed.
+    """
+    now = timezone.now()
+    latest = {}
+    for user_id, question_id, choice_id, *cast_at in ballots:
+        latest[(user_id, question_id)] = (choice_id,
+                                          cast_at[0] if cast_at else now)
+    if not latest:
+        return set()
+
+    user_ids = {user_id for user_id, _ in latest}
+    question_ids = {question_id for _, question_id in latest}
+    choice_deltas = Counter()
+    question_deltas = Counter()
+
+    with transaction.atomic():
+        finalized = set(Question.objects.filter(
+            pk__in=question_ids, finalized_at__isnull=False)
+            .values_list('pk', flat=True))
+        existing = {}
+        for vote in Vote.objects.select_for_update()\
+                .filter(user_id__in=user_ids, question_id__in=question_ids)\
+                .only('pk', 'user_id', 'question_id', 'choice_id', 'cast_at'):
+            if (vote.user_id, vote.question_id) in latest:
+                existing[(vote.user_id, vote.question_id)] = vote
+
+        new_votes = []
+        switched_votes = []
+        for (user_id, question_id), (choice_id, cast_at) in latest.items():
+            if question_id in finalized:
+                continue
+            vote = existing.get((user_id, question_id))
+            if vote is None:
+                new_votes.append(Vote(user_id=user_id,
+                                      question_id=question_id,
+                                      choice_id=choice_id, cast_at=cast_at))
+                question_deltas[question_id] += 1
+            elif vote.cast_at is not None and vote.cast_at > cast_at:
+                continue    # a newer vote is already recorded
+            elif vote.choice_id != choice_id:
+                choice_deltas[vote.choice_id] -= 1
+                vote.choice_id = choice_id
+                vote.cast_at = cast_at
+                switched_votes.append(vote)
+            else:
+                continue
+            choice_deltas[choice_id] += 1
+
+        Vote.objects.bulk_create(new_votes)
+        Vote.objects.bulk_update(switched_votes, ['choice', 'cast_at'])
+        _add_to_tallies(Choice, 'vote_count', choice_deltas)
+        _add_to_tallies(Question, 'total_votes', question_deltas)
+        changed = {vote.question_id for vote in new_votes + switched_votes}
+        Question.objects.filter(pk__in=changed).update(**_results_changed())
+
+    return changed
+
+
+def rebuild_tallies(question_ids=None, fix: bool = True) -> list:
+    """
+    Recounts the votes of every choice of the polls not finalized yet
+    (optionally only those of the given questions) from the Vote table
+    and compares them with the stored tallies.
+
+    Args:
+        question_ids: Only check these questions, or all if None.
+        fix: Write the recounted tallies back when they differ.
+
+    Returns:
+        list: (model name, pk, stored, actual) for every stale tally.
+    """
+    # the tallies of finalized questions are their snapshot, and their
+    # votes may have been archived
+    choices = Choice.objects.filter(question__finalized_at__isnull=True)
+    questions = Question.objects.filter(finalized_at__isnull=True)
+    if question_ids is not None:
+        choices = choices.filter(question_id__in=question_ids)
+        questions = questions.filter(pk__in=question_ids)
+
+    mismatches = []
+    totals = {}
+    stale_choices = []
+    for choice in choices.annotate(actual=Count('vote')).order_by('pk'):
+        totals[choice.question_id] = \
+            totals.get(choice.question_id, 0) + choice.actual
+        if choice.vote_count != choice.actual:
+            mismatches.append(
+                ('choice', choice.pk, choice.vote_count, choice.actual))
+            choice.vote_count = choice.actual
+            stale_choices.append(choice)
+
+    stale_questions = []
+    for question in questions.order_by('pk'):
+        actual = totals.get(question.pk, 0)
+        if question.total_votes != actual:
+            mismatches.append(
+                ('question', question.pk, question.total_votes, actual))
+            question.total_votes = actual
+            stale_questions.append(question)
+
+    if fix and mismatches:
+        with transaction.atomic():
+            Choice.objects.bulk_update(stale_choices, ['vote_count'])
+            Question.objects.bulk_update(stale_questions, ['total_votes'])
+            Question.objects.filter(
+                pk__in={choice.question_id for choice in stale_choices}
+                | {question.pk for question in stale_questions}
+            ).update(**_results_changed())
+    return mismatches